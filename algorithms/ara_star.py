@@ -0,0 +1,153 @@
+# algorithms/ara_star.py
+import heapq
+import time
+from algorithms.stats import record
+from grid_env import as_compact, disconnected
+
+INF = float('inf')
+
+
+class ARAStar:
+    # Anytime Repairing A*: search with f = g + epsilon * h, publish the path, lower epsilon
+    # and continue from the same g values. Nodes improved after they were closed wait in
+    # incons for the next round instead of being re-expanded in this one. search() may be
+    # called repeatedly, each call resuming where the last one ran out of budget.
+    def __init__(self, grid, start, goal, weight=3.0, decrement=0.5, on_expand=None):
+        self.grid = as_compact(grid)
+        self.start = start
+        self.goal = goal
+        self.source = self.grid.index(*start)
+        self.target = self.grid.index(*goal)
+        stride = self.grid.stride
+        self.gy, self.gx = divmod(self.target, stride)
+        self.epsilon = weight
+        self.decrement = decrement
+        self.on_expand = on_expand
+        self.g = {self.source: 0}
+        self.came_from = {}
+        self.open = {self.source}
+        self.closed = set()
+        self.incons = set()
+        self.heap = [(weight * self.h(self.source), 0, self.source)]
+        self.expansions = self.pushes = self.pops = 0
+        self.max_open = 1
+        self.elapsed = 0.0
+        self.path = []
+        self.cost = INF
+        self.bound = INF
+        self.done = False
+        # (elapsed seconds, expansions, cost, bound) for every published path
+        self.solutions = []
+
+    def h(self, i):
+        y, x = divmod(i, self.grid.stride)
+        return abs(x - self.gx) + abs(y - self.gy)
+
+    def improve(self, stop, limit):
+        # One weighted search round. Returns False if the budget ran out before it finished.
+        cells, offsets = self.grid.cells, self.grid.neighbor_offsets
+        stride = self.grid.stride
+        g, came_from, heap = self.g, self.came_from, self.heap
+        open_set, closed, incons = self.open, self.closed, self.incons
+        epsilon, target, on_expand = self.epsilon, self.target, self.on_expand
+        gx, gy = self.gx, self.gy
+        while heap:
+            f, neg_g, s = heap[0]
+            if s not in open_set or -neg_g != g[s]:
+                heapq.heappop(heap)
+                self.pops += 1
+                continue
+            if g.get(target, INF) <= f:
+                return True
+            if limit is not None and self.expansions >= limit:
+                return False
+            if stop is not None and self.expansions & 31 == 0 and time.perf_counter() >= stop:
+                return False
+            heapq.heappop(heap)
+            self.pops += 1
+            open_set.discard(s)
+            closed.add(s)
+            self.expansions += 1
+            if on_expand is not None:
+                on_expand(self.grid.coords(s))
+
+            tentative_g = -neg_g + 1
+            for offset in offsets:
+                n = s + offset
+                if cells[n] or tentative_g >= g.get(n, INF):
+                    continue
+                g[n] = tentative_g
+                came_from[n] = s
+                if n in closed:
+                    incons.add(n)
+                else:
+                    open_set.add(n)
+                    ny, nx = divmod(n, stride)
+                    heapq.heappush(heap, (tentative_g + epsilon * (abs(nx - gx) + abs(ny - gy)), -tentative_g, n))
+                    self.pushes += 1
+            if len(heap) > self.max_open:
+                self.max_open = len(heap)
+        return True
+
+    def publish(self):
+        # Suboptimality bound: cost over the smallest g + h still waiting to be expanded
+        cost = self.g.get(self.target, INF)
+        if cost == INF:
+            return
+        waiting = self.open | self.incons
+        lower = min((self.g[s] + self.h(s) for s in waiting), default=cost)
+        bound = 1.0 if lower >= cost else min(self.epsilon, cost / lower)
+        if cost < self.cost or bound < self.bound:
+            if cost < self.cost:
+                path, current = [], self.target
+                while current != self.source:
+                    path.append(self.grid.coords(current))
+                    current = self.came_from[current]
+                path.append(self.start)
+                self.path, self.cost = path[::-1], cost
+            self.bound = bound
+            self.solutions.append((self.elapsed, self.expansions, cost, bound))
+
+    def next_round(self):
+        # Rounds above the bound already proven would only reproduce the current path
+        self.epsilon = max(1.0, min(self.epsilon - self.decrement, self.bound))
+        g, h = self.g, self.h
+        self.open |= self.incons
+        self.incons = set()
+        self.closed = set()
+        self.heap = [(g[s] + self.epsilon * h(s), -g[s], s) for s in self.open]
+        heapq.heapify(self.heap)
+        self.pushes += len(self.heap)
+
+    def search(self, deadline=None, max_expansions=None, stats=None):
+        # deadline in seconds and/or an expansion budget for this call; returns (path, bound)
+        # for the best path so far, ([], inf) if none has been found yet
+        start_time = time.perf_counter()
+        stop = start_time + deadline if deadline is not None else None
+        limit = self.expansions + max_expansions if max_expansions is not None else None
+        expansions, pushes, pops = self.expansions, self.pushes, self.pops
+        if not self.done and disconnected(self.grid, self.start, self.goal):
+            self.done = True
+        while not self.done:
+            finished = self.improve(stop, limit)
+            self.elapsed += time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            if not finished:
+                break
+            self.publish()
+            if self.bound <= 1.0 or self.cost == INF:
+                self.done = True
+            elif stop is not None and time.perf_counter() >= stop:
+                break
+            else:
+                self.next_round()
+        if stats is not None:
+            record(stats, self.max_open, expanded=self.expansions - expansions,
+                   pushes=self.pushes - pushes, pops=self.pops - pops)
+        return self.path, self.bound
+
+
+def ara_star(grid, start, goal, weight=3.0, deadline=None, max_expansions=None, stats=None, on_expand=None):
+    # Best path within the budget; without one this runs down to epsilon = 1 and is optimal
+    planner = ARAStar(grid, start, goal, weight, on_expand=on_expand)
+    return planner.search(deadline, max_expansions, stats)[0]
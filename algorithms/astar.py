@@ -1,44 +1,143 @@
 # algorithms/astar.py
 import heapq
-from collections import defaultdict
+from algorithms.search_context import search_context
+from algorithms.stats import record, record_counts
+from grid_env import as_compact, disconnected
 
 def heuristic(a, b):
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def astar(grid, start, goal):
-    width, height = len(grid[0]), len(grid)
-    open_set = []
-    heapq.heappush(open_set, (heuristic(start, goal), 0, start))
-    came_from = {}
-    g_score = defaultdict(lambda: float('inf'))
-    g_score[start] = 0
-    visited = set()
+def astar(grid, start, goal, distance_field=None, stats=None, on_expand=None):
+    # distance_field: optional DistanceField rooted at goal, used as an exact heuristic.
+    # stats: optional dict the search counters are added into (see algorithms.stats).
+    # on_expand: optional callback given each expanded (x, y), e.g. to animate the frontier.
+    grid = as_compact(grid)
+    if disconnected(grid, start, goal):
+        print(f"A* failed to reach goal from {start} to {goal}")
+        return []
+    source, target = grid.index(*start), grid.index(*goal)
+    # g, parent and closed state live in a context reused across queries on this grid
+    with search_context(grid) as ctx:
+        path = _astar(ctx, grid, source, target, distance_field, stats, on_expand)
+    if not path:
+        print(f"A* failed to reach goal from {start} to {goal}")
+    return path
+
+def _astar(ctx, grid, source, target, distance_field, stats, on_expand):
+    # A cell's g and parent are only valid once its stamp reaches seen (closed is seen + 1);
+    # anything stamped lower is left over from an earlier query
+    cells, stride = grid.cells, grid.stride
+    offsets = grid.neighbor_offsets
+    gx, gy = target % stride, target // stride
+    g_score, came_from, stamp = ctx.g, ctx.parent, ctx.stamp
+    seen = ctx.begin()
+    closed = seen + 1
+    g_score[source] = 0
+    stamp[source] = seen
+    open_set = [(abs(source % stride - gx) + abs(source // stride - gy), 0, source)]
+    h = distance_field.dist if distance_field is not None else None
+    pops = max_open = 0
 
     while open_set:
+        if stats is not None:
+            pops += 1
+            max_open = max(max_open, len(open_set))
         _, cost, current = heapq.heappop(open_set)
-        if current in visited:
+        if stamp[current] == closed:
             continue
-        visited.add(current)
+        stamp[current] = closed
+        if on_expand is not None:
+            on_expand(grid.coords(current))
 
-        if current == goal:
+        if current == target:
+            if stats is not None:
+                record_counts(stats, pops, max_open, len(open_set), *ctx.counts(seen))
             path = []
-            while current in came_from:
-                path.append(current)
+            while current != source:
+                path.append(grid.coords(current))
                 current = came_from[current]
-            path.append(start)
+            path.append(grid.coords(source))
             return path[::-1]
 
-        for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
-            neighbor = (current[0]+dx, current[1]+dy)
-            if 0 <= neighbor[0] < width and 0 <= neighbor[1] < height:
-                if grid[neighbor[1]][neighbor[0]] == 1:
-                    continue
-                tentative_g = g_score[current] + 1
-                if tentative_g < g_score[neighbor]:
-                    g_score[neighbor] = tentative_g
-                    f = tentative_g + heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f, tentative_g, neighbor))
-                    came_from[neighbor] = current
-
-    print(f"A* failed to reach goal from {start} to {goal}")
+        tentative_g = cost + 1
+        for offset in offsets:
+            neighbor = current + offset
+            if cells[neighbor]:
+                continue
+            if stamp[neighbor] < seen or tentative_g < g_score[neighbor]:
+                g_score[neighbor] = tentative_g
+                stamp[neighbor] = seen
+                if h is None:
+                    f = tentative_g + abs(neighbor % stride - gx) + abs(neighbor // stride - gy)
+                else:
+                    f = tentative_g + h[neighbor]
+                heapq.heappush(open_set, (f, tentative_g, neighbor))
+                came_from[neighbor] = current
+
+    if stats is not None:
+        record_counts(stats, pops, max_open, len(open_set), *ctx.counts(seen))
     return []
+
+def bidirectional_astar(grid, start, goal, stats=None, on_expand=None):
+    # Forward search towards goal and backward search towards start, expanding whichever
+    # open list is smaller. mu is the best start-goal cost seen where the two searches
+    # meet; it is optimal once either open list has no f value below it.
+    grid = as_compact(grid)
+    if disconnected(grid, start, goal):
+        return []
+    cells, stride = grid.cells, grid.stride
+    offsets = grid.neighbor_offsets
+    source, target = grid.index(*start), grid.index(*goal)
+    if source == target:
+        return [start]
+    inf = float('inf')
+    # Per direction: [open heap, g, parent, closed, heuristic target x, y]
+    forward = [[(heuristic(start, goal), 0, source)], {source: 0}, {source: None}, set(), target % stride, target // stride]
+    backward = [[(heuristic(start, goal), 0, target)], {target: 0}, {target: None}, set(), source % stride, source // stride]
+    mu, meet = inf, None
+    pops = max_open = 0
+
+    while forward[0] and backward[0]:
+        if forward[0][0][0] >= mu or backward[0][0][0] >= mu:
+            break
+        side, other = (forward, backward) if len(forward[0]) <= len(backward[0]) else (backward, forward)
+        open_set, g_score, parent, closed, hx, hy = side
+        other_g = other[1]
+        if stats is not None:
+            pops += 1
+            max_open = max(max_open, len(forward[0]) + len(backward[0]))
+        _, cost, current = heapq.heappop(open_set)
+        if current in closed:
+            continue
+        closed.add(current)
+        if on_expand is not None:
+            on_expand(grid.coords(current))
+
+        tentative_g = cost + 1
+        for offset in offsets:
+            neighbor = current + offset
+            if cells[neighbor] or tentative_g >= g_score.get(neighbor, inf):
+                continue
+            g_score[neighbor] = tentative_g
+            parent[neighbor] = current
+            heapq.heappush(open_set, (tentative_g + abs(neighbor % stride - hx) + abs(neighbor // stride - hy), tentative_g, neighbor))
+            if neighbor in other_g and tentative_g + other_g[neighbor] < mu:
+                mu, meet = tentative_g + other_g[neighbor], neighbor
+
+    if stats is not None:
+        expanded = len(forward[3]) + len(backward[3])
+        pushes = pops + len(forward[0]) + len(backward[0])
+        record(stats, max_open, expanded=expanded, pushes=pushes, pops=pops, stale=pops - expanded,
+               reopened=pushes - len(forward[1]) - len(backward[1]))
+    if meet is None:
+        return []
+    path, current = [], meet
+    while current is not None:
+        path.append(grid.coords(current))
+        current = forward[2][current]
+    path.reverse()
+    current = backward[2][meet]
+    while current is not None:
+        path.append(grid.coords(current))
+        current = backward[2][current]
+    return path
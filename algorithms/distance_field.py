@@ -0,0 +1,143 @@
+# algorithms/distance_field.py
+import heapq
+from array import array
+from collections import OrderedDict, deque
+import numpy as np
+from grid_env import as_compact
+
+INF = float('inf')
+# Stored distance of cells the goal cannot reach: fields are int32 buffers, 4 bytes a cell,
+# and the sentinel still compares above every real distance
+UNREACHED = 2 ** 31 - 1
+
+
+def wavefront(grid, goal_index):
+    # Breadth-first wave from the goal, one NumPy step per distance ring.
+    # The blocked border means neighbour indices never leave the buffer.
+    free = np.frombuffer(grid.cells, dtype=np.uint8) == 0
+    dist = np.full(len(grid.cells), -1, dtype=np.int32)
+    if not free[goal_index]:
+        return dist
+    offsets = np.array(grid.neighbor_offsets)
+    dist[goal_index] = 0
+    frontier = np.array([goal_index])
+    d = 0
+    while frontier.size:
+        d += 1
+        neighbors = (frontier[:, None] + offsets).ravel()
+        neighbors = np.unique(neighbors[free[neighbors] & (dist[neighbors] < 0)])
+        dist[neighbors] = d
+        frontier = neighbors
+    return dist
+
+
+class DistanceField:
+    def __init__(self, grid, goal):
+        self.grid = as_compact(grid)
+        self.goal = goal
+        self.goal_index = self.grid.index(*goal)
+        self.compute()
+
+    def compute(self):
+        dist = wavefront(self.grid, self.goal_index)
+        dist[dist < 0] = UNREACHED
+        self.dist = array('i')
+        self.dist.frombytes(dist.tobytes())
+        self.version = self.grid.version
+
+    def distance(self, pos):
+        d = self.dist[self.grid.index(*pos)]
+        return INF if d == UNREACHED else d
+
+    def path_from(self, start):
+        # Walk downhill: every reachable cell has a neighbour exactly one step closer
+        dist, offsets = self.dist, self.grid.neighbor_offsets
+        current = self.grid.index(*start)
+        if dist[current] == UNREACHED:
+            return []
+        path = [start]
+        while current != self.goal_index:
+            d = dist[current] - 1
+            for offset in offsets:
+                if dist[current + offset] == d:
+                    current += offset
+                    break
+            path.append(self.grid.coords(current))
+        return path
+
+    def repair(self, changed):
+        cells, dist, offsets = self.grid.cells, self.dist, self.grid.neighbor_offsets
+        goal = self.goal_index
+        changed = [self.grid.index(x, y) for x, y in changed]
+        if cells[goal] or goal in changed:
+            self.compute()
+            return
+
+        # Blocking cells can only lengthen distances: drop every cell that has no
+        # remaining neighbour one step closer to the goal, spreading outwards.
+        queue = deque()
+        invalid = []
+        for i in changed:
+            if cells[i] and dist[i] != UNREACHED:
+                dist[i] = UNREACHED
+                queue.append(i)
+        while queue:
+            u = queue.popleft()
+            for offset in offsets:
+                v = u + offset
+                dv = dist[v]
+                if dv == UNREACHED or v == goal:
+                    continue
+                if any(dist[v + o] == dv - 1 for o in offsets):
+                    continue
+                dist[v] = UNREACHED
+                invalid.append(v)
+                queue.append(v)
+
+        # Re-seed the dropped cells (and any freed cells) from their valid neighbours
+        heap = []
+        for v in invalid + [i for i in changed if not cells[i]]:
+            best = min(dist[v + offset] for offset in offsets) + 1
+            if best < dist[v]:
+                heapq.heappush(heap, (best, v))
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d >= dist[v]:
+                continue
+            dist[v] = d
+            for offset in offsets:
+                n = v + offset
+                if not cells[n] and d + 1 < dist[n]:
+                    heapq.heappush(heap, (d + 1, n))
+        self.version = self.grid.version
+
+
+class DistanceFieldCache:
+    # Goal -> DistanceField, least recently used first. Subscribe apply_changes to
+    # GridEnvironment so fields are repaired in place instead of rebuilt.
+    def __init__(self, grid, maxsize=16):
+        self.grid = as_compact(grid)
+        self.maxsize = maxsize
+        self.fields = OrderedDict()
+
+    def get(self, goal):
+        field = self.fields.get(goal)
+        if field is None:
+            field = self.fields[goal] = DistanceField(self.grid, goal)
+            if len(self.fields) > self.maxsize:
+                self.fields.popitem(last=False)
+        else:
+            self.fields.move_to_end(goal)
+            if field.version != self.grid.version:
+                field.compute()
+        return field
+
+    def apply_changes(self, changed):
+        # Only fields that were current right before this change set can be repaired;
+        # anything older missed an update and is rebuilt on its next get().
+        for field in self.fields.values():
+            if field.version == self.grid.version - 1:
+                field.repair(changed)
+
+    def path(self, start, goal):
+        return self.get(goal).path_from(start)
@@ -1,83 +1,131 @@
 # algorithms/dstar_lite.py
-import heapq
 from collections import defaultdict
+from algorithms.priority_queue import IndexedPriorityQueue
+from algorithms.stats import counting, record
+from grid_env import as_compact, disconnected
 
 def heuristic(a, b):
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def get_neighbors(pos, grid):
-    x, y = pos
-    neighbors = []
-    for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < len(grid[0]) and 0 <= ny < len(grid):
-            if grid[ny][nx] == 0:
-                neighbors.append((nx, ny))
-    return neighbors
-
 class DStarLite:
-    def __init__(self, grid, start, goal):
-        self.grid = grid
+    def __init__(self, grid, start, goal, stats=None, on_expand=None):
+        # stats: optional dict the search counters of every replan are added into
+        # on_expand: optional callback given each expanded (x, y)
+        # Planner state is keyed by cell index; start/goal stay (x, y) for callers
+        self.source = grid
+        self.grid = as_compact(grid)
+        self.cells = self.grid.cells
+        self.stride = self.grid.stride
+        self.offsets = self.grid.neighbor_offsets
         self.start = start
         self.goal = goal
+        self.start_index = self.grid.index(*start)
+        self.goal_index = self.grid.index(*goal)
         self.g = defaultdict(lambda: float('inf'))
         self.rhs = defaultdict(lambda: float('inf'))
-        self.rhs[goal] = 0
-        self.U = []
+        self.rhs[self.goal_index] = 0
+        self.U = IndexedPriorityQueue()
         self.km = 0
         self.last = start
-        self.insert(goal, self.calculate_key(goal))
+        self.stats = stats
+        self.on_expand = on_expand
+        if stats is not None:
+            self.update_vertex = counting(stats, 'update_vertex', self.update_vertex)
+        self.U.push(self.goal_index, self.calculate_key(self.goal_index))
 
-    def calculate_key(self, s):
-        return (min(self.g[s], self.rhs[s]) + heuristic(self.start, s) + self.km, min(self.g[s], self.rhs[s]))
+    def neighbors(self, u):
+        cells = self.cells
+        return [u + offset for offset in self.offsets if not cells[u + offset]]
 
-    def insert(self, s, key):
-        heapq.heappush(self.U, (key, s))
+    def calculate_key(self, s):
+        sy, sx = divmod(s, self.stride)
+        ty, tx = divmod(self.start_index, self.stride)
+        k = min(self.g[s], self.rhs[s])
+        return (k + abs(sx - tx) + abs(sy - ty) + self.km, k)
 
     def update_vertex(self, u):
-        if u != self.goal:
-            neighbors = get_neighbors(u, self.grid)
-            if neighbors:
+        if u != self.goal_index:
+            neighbors = self.neighbors(u)
+            if self.cells[u]:
+                self.rhs[u] = float('inf')
+            elif neighbors:
                 self.rhs[u] = min(self.g[s] + 1 for s in neighbors)
             else:
                 self.rhs[u] = float('inf')
 
-        if u in [item[1] for item in self.U]:
-            self.U = [(k, s) for (k, s) in self.U if s != u]
-            heapq.heapify(self.U)
         if self.g[u] != self.rhs[u]:
-            self.insert(u, self.calculate_key(u))
+            self.U.push(u, self.calculate_key(u))
+        else:
+            self.U.discard(u)
 
     def compute_shortest_path(self):
-        while self.U and (self.U[0][0] < self.calculate_key(self.start) or self.rhs[self.start] != self.g[self.start]):
-            k_old, u = heapq.heappop(self.U)
+        s_start = self.start_index
+        stats, on_expand = self.stats, self.on_expand
+        pushes, stale = self.U.pushes, self.U.stale
+        expanded = reopened = max_open = 0
+        while self.U and (self.U.top_key() < self.calculate_key(s_start) or self.rhs[s_start] != self.g[s_start]):
+            k_old = self.U.top_key()
+            u = self.U.top()
+            if stats is not None:
+                expanded += 1
+                max_open = max(max_open, len(self.U))
+            if on_expand is not None:
+                on_expand(self.grid.coords(u))
             k_new = self.calculate_key(u)
             if k_old < k_new:
-                self.insert(u, k_new)
+                self.U.push(u, k_new)
             elif self.g[u] > self.rhs[u]:
                 self.g[u] = self.rhs[u]
-                for s in get_neighbors(u, self.grid):
+                self.U.pop()
+                for s in self.neighbors(u):
                     self.update_vertex(s)
             else:
-                g_old = self.g[u]
+                # Underconsistent: g is raised back to inf and u goes round again
+                reopened += 1
                 self.g[u] = float('inf')
-                for s in get_neighbors(u, self.grid) + [u]:
+                for s in self.neighbors(u) + [u]:
                     self.update_vertex(s)
+        if stats is not None:
+            # Every processed top entry counts as a pop, whether it was expanded or re-keyed
+            record(stats, max_open, expanded=expanded, pops=expanded, pushes=self.U.pushes - pushes,
+                   stale=self.U.stale - stale, reopened=reopened)
+
+    def move_start(self, pos):
+        self.km += heuristic(self.last, pos)
+        self.last = pos
+        self.start = pos
+        self.start_index = self.grid.index(*pos)
+
+    def notify_cells_changed(self, cells):
+        for x, y in cells:
+            u = self.grid.index(x, y)
+            if self.source is not self.grid:
+                # A list-of-lists grid was copied on construction, pull the new value across
+                self.cells[u] = 1 if self.source[y][x] else 0
+            self.update_vertex(u)
+            for s in self.neighbors(u):
+                self.update_vertex(s)
+
+    def replan(self, changed_cells=()):
+        self.notify_cells_changed(changed_cells)
+        if disconnected(self.grid, self.start, self.goal):
+            return []
+        self.compute_shortest_path()
+        return self.extract_path()
 
     def extract_path(self):
         path = []
-        current = self.start
+        current = self.start_index
         if self.g[current] == float('inf'):
             return []
-        while current != self.goal:
-            path.append(current)
-            current = min(get_neighbors(current, self.grid), key=lambda s: self.g[s] + 1, default=current)
+        while current != self.goal_index:
+            path.append(self.grid.coords(current))
+            current = min(self.neighbors(current), key=lambda s: self.g[s] + 1, default=current)
             if self.g[current] == float('inf'):
                 return []
         path.append(self.goal)
         return path
 
-def dstar_lite(grid, start, goal):
-    planner = DStarLite(grid, start, goal)
-    planner.compute_shortest_path()
-    return planner.extract_path()
\ No newline at end of file
+def dstar_lite(grid, start, goal, stats=None, on_expand=None):
+    planner = DStarLite(grid, start, goal, stats, on_expand)
+    return planner.replan()
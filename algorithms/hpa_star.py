@@ -0,0 +1,272 @@
+# algorithms/hpa_star.py
+import heapq
+import numpy as np
+from algorithms.astar import astar
+from algorithms.stats import record_search
+from grid_env import CompactGrid, GridEnvironment, as_compact, disconnected
+
+# Entrances at least this long get a transition at each end instead of one in the middle
+LONG_ENTRANCE = 6
+# A change touching more than this share of the clusters is cheaper to rebuild from scratch
+REBUILD_SHARE = 0.5
+
+
+class HierarchicalGrid:
+    # HPA*: the map is cut into square clusters, free runs along each shared border
+    # become entrances, and each cluster stores the distances between its entrance
+    # nodes. Queries search that abstract graph and refine it cluster by cluster.
+    def __init__(self, grid, cluster_size=16):
+        self.grid = as_compact(grid)
+        self.cluster_size = cluster_size
+        self.cols = -(-self.grid.width // cluster_size)
+        self.rows = -(-self.grid.height // cluster_size)
+        self.rebuild()
+
+    def rebuild(self):
+        self.transitions = {}
+        self.cluster_nodes = {}
+        self.edges = {}
+        # cluster -> its window, until a change lands in the cluster
+        self.windows = {}
+        for cluster in range(self.cols * self.rows):
+            for border in self.borders(cluster):
+                if border not in self.transitions:
+                    self.build_border(border)
+        for cluster in range(self.cols * self.rows):
+            self.build_cluster(cluster)
+        # The cells the hierarchy was built on, so changes made behind its back can be diffed
+        self.snapshot = bytearray(self.grid.cells)
+        self.version = self.grid.version
+
+    def cluster_of(self, x, y):
+        return (y // self.cluster_size) * self.cols + x // self.cluster_size
+
+    def bounds(self, cluster):
+        cy, cx = divmod(cluster, self.cols)
+        size = self.cluster_size
+        return (cx * size, cy * size, min((cx + 1) * size, self.grid.width), min((cy + 1) * size, self.grid.height))
+
+    def borders(self, cluster):
+        # A border is (left/top cluster, right/bottom cluster)
+        cy, cx = divmod(cluster, self.cols)
+        result = []
+        if cx > 0:
+            result.append((cluster - 1, cluster))
+        if cx < self.cols - 1:
+            result.append((cluster, cluster + 1))
+        if cy > 0:
+            result.append((cluster - self.cols, cluster))
+        if cy < self.rows - 1:
+            result.append((cluster, cluster + self.cols))
+        return result
+
+    def build_border(self, border):
+        grid, cells = self.grid, self.grid.cells
+        a, b = border
+        x0, y0, x1, y1 = self.bounds(a)
+        # Same cluster row means a left/right border; b == a + 1 alone cannot tell when cols == 1
+        if a // self.cols == b // self.cols:
+            line = [(grid.index(x1 - 1, y), grid.index(x1, y)) for y in range(y0, y1)]
+        else:
+            line = [(grid.index(x, y1 - 1), grid.index(x, y1)) for x in range(x0, x1)]
+
+        pairs, run = [], []
+        for pair in line + [None]:
+            if pair is not None and not cells[pair[0]] and not cells[pair[1]]:
+                run.append(pair)
+                continue
+            if len(run) >= LONG_ENTRANCE:
+                pairs += [run[0], run[-1]]
+            elif run:
+                pairs.append(run[len(run) // 2])
+            run = []
+
+        for u, v in self.transitions.get(border, ()):
+            self.edges.get(u, {}).pop(v, None)
+            self.edges.get(v, {}).pop(u, None)
+        self.transitions[border] = pairs
+        for u, v in pairs:
+            self.edges.setdefault(u, {})[v] = 1
+            self.edges.setdefault(v, {})[u] = 1
+
+    def window(self, cluster):
+        # The cluster copied into its own padded grid, so local searches cannot leave it
+        window = self.windows.get(cluster)
+        if window is None:
+            x0, y0, x1, y1 = self.bounds(cluster)
+            sub = CompactGrid(x1 - x0, y1 - y0)
+            sub.assign(self.grid.interior()[y0:y1, x0:x1])
+            window = self.windows[cluster] = (sub, x0, y0)
+        return window
+
+    def local_distances(self, window, source, targets):
+        # BFS inside one cluster window from source, stopping once every target is reached
+        sub, x0, y0 = window
+        cells, offsets = sub.cells, sub.neighbor_offsets
+        wanted = {sub.index(*self.shift(t, -x0, -y0)): t for t in targets}
+        start = sub.index(*self.shift(source, -x0, -y0))
+        dist = {start: 0}
+        found = {}
+        if start in wanted:
+            found[wanted[start]] = 0
+        frontier, d = [start], 0
+        while frontier and len(found) < len(wanted):
+            d += 1
+            next_frontier = []
+            for u in frontier:
+                for offset in offsets:
+                    v = u + offset
+                    if cells[v] or v in dist:
+                        continue
+                    dist[v] = d
+                    next_frontier.append(v)
+                    if v in wanted:
+                        found[wanted[v]] = d
+            frontier = next_frontier
+        return found
+
+    def shift(self, i, dx, dy):
+        x, y = self.grid.coords(i)
+        return (x + dx, y + dy)
+
+    def build_cluster(self, cluster):
+        nodes = set()
+        for border in self.borders(cluster):
+            side = 0 if border[0] == cluster else 1
+            nodes.update(pair[side] for pair in self.transitions.get(border, ()))
+
+        for u in self.cluster_nodes.get(cluster, ()):
+            links = self.edges.get(u, {})
+            for v in [v for v in links if v in self.cluster_nodes[cluster]]:
+                del links[v]
+        self.cluster_nodes[cluster] = nodes
+
+        window = self.window(cluster)
+        for u in nodes:
+            links = self.edges.setdefault(u, {})
+            for v, d in self.local_distances(window, u, nodes).items():
+                if v != u:
+                    links[v] = d
+
+    def notify_cells_changed(self, cells):
+        grid = self.grid
+        for x, y in cells:
+            i = grid.index(x, y)
+            self.snapshot[i] = grid.cells[i]
+        touched = {self.cluster_of(x, y) for x, y in cells}
+        for cluster in touched:
+            self.windows.pop(cluster, None)
+        borders = {border for cluster in touched for border in self.borders(cluster)}
+        refresh = set(touched)
+        for border in borders:
+            before = self.transitions.get(border)
+            self.build_border(border)
+            if self.transitions[border] != before:
+                refresh.update(border)
+        for cluster in refresh:
+            self.build_cluster(cluster)
+        self.version = self.grid.version
+
+    def apply_changes(self, changed):
+        # GridEnvironment listener; a change set that arrives after a missed one is left to sync()
+        if self.version == self.grid.version - 1:
+            self.notify_cells_changed(changed)
+
+    def sync(self):
+        # Catch up with changes nobody reported by diffing the cells against the snapshot,
+        # updating only the touched clusters unless most of the map moved
+        if self.version == self.grid.version:
+            return
+        before = np.frombuffer(self.snapshot, dtype=np.uint8)
+        changed = np.flatnonzero(before != np.frombuffer(self.grid.cells, dtype=np.uint8))
+        cells = [self.grid.coords(i) for i in changed.tolist()]
+        if len({self.cluster_of(x, y) for x, y in cells}) > REBUILD_SHARE * self.cols * self.rows:
+            self.rebuild()
+        else:
+            self.notify_cells_changed(cells)
+
+    def abstract_path(self, start, goal, stats=None):
+        # Abstract route [start, entrance nodes..., goal] as cell indices, [] if none exists
+        grid = self.grid
+        s, t = grid.index(*start), grid.index(*goal)
+        s_cluster, t_cluster = self.cluster_of(*start), self.cluster_of(*goal)
+        targets = self.cluster_nodes[s_cluster] | {t} if s_cluster == t_cluster else self.cluster_nodes[s_cluster]
+        start_links = dict(self.edges.get(s, {}))
+        start_links.update(self.local_distances(self.window(s_cluster), s, targets))
+        start_links.pop(s, None)
+        goal_links = self.local_distances(self.window(t_cluster), t, self.cluster_nodes[t_cluster])
+
+        stride = grid.stride
+        gy, gx = divmod(t, stride)
+        open_set = [(0, 0, s)]
+        came_from = {s: None}
+        g_score = {s: 0}
+        closed = set()
+        pops = max_open = 0
+        route = []
+        while open_set:
+            if stats is not None:
+                pops += 1
+                max_open = max(max_open, len(open_set))
+            _, cost, u = heapq.heappop(open_set)
+            if u in closed:
+                continue
+            closed.add(u)
+            if u == t:
+                while u is not None:
+                    route.append(u)
+                    u = came_from[u]
+                route.reverse()
+                break
+            links = start_links if u == s else self.edges.get(u, {})
+            if u in goal_links:
+                links = dict(links)
+                links[t] = min(links.get(t, float('inf')), goal_links[u])
+            for v, d in links.items():
+                g = cost + d
+                if g < g_score.get(v, float('inf')):
+                    g_score[v] = g
+                    came_from[v] = u
+                    vy, vx = divmod(v, stride)
+                    heapq.heappush(open_set, (g + abs(vx - gx) + abs(vy - gy), g, v))
+        if stats is not None:
+            # Counted on the abstract graph: expansions are entrance nodes, not cells
+            record_search(stats, pops, max_open, open_set, closed, g_score)
+        return route
+
+    def refine(self, route):
+        # Lazily turn an abstract route into cells, one cluster-local astar per hop
+        grid = self.grid
+        if not route:
+            return
+        yield grid.coords(route[0])
+        for u, v in zip(route, route[1:]):
+            cu, cv = self.cluster_of(*grid.coords(u)), self.cluster_of(*grid.coords(v))
+            if cu != cv:
+                yield grid.coords(v)
+                continue
+            sub, x0, y0 = self.window(cu)
+            a, b = self.shift(u, -x0, -y0), self.shift(v, -x0, -y0)
+            for x, y in astar(sub, a, b)[1:]:
+                yield (x + x0, y + y0)
+
+    def find_path(self, start, goal, stats=None):
+        self.sync()
+        if start == goal:
+            return [start]
+        if disconnected(self.grid, start, goal):
+            return []
+        return list(self.refine(self.abstract_path(start, goal, stats)))
+
+
+def hpa_star(grid, start, goal, stats=None):
+    # grid may be a GridEnvironment, whose change sets then keep the cached hierarchy current;
+    # on a bare grid, changes are found by diffing on the next query
+    env = grid if isinstance(grid, GridEnvironment) else None
+    grid = as_compact(env.grid if env is not None else grid)
+    hierarchy = grid.caches.get('hierarchy')
+    if hierarchy is None:
+        hierarchy = grid.caches['hierarchy'] = HierarchicalGrid(grid)
+        if env is not None:
+            env.subscribe(hierarchy.apply_changes)
+    return hierarchy.find_path(start, goal, stats)
@@ -0,0 +1,243 @@
+# algorithms/jps.py
+import heapq
+from array import array
+import numpy as np
+from algorithms.stats import record_search
+from grid_env import as_compact, disconnected
+
+# Jump Point Search for 4-connected uniform-cost grids. Horizontal jumps stop at
+# forced neighbours, vertical jumps also stop wherever a horizontal jump from that
+# cell would find something, so only jump points enter the open list.
+
+def jump_horizontal(cells, stride, i, step, target):
+    while True:
+        i += step
+        if cells[i]:
+            return -1
+        if i == target:
+            return i
+        if (not cells[i - stride] and cells[i - step - stride]) or (not cells[i + stride] and cells[i - step + stride]):
+            return i
+
+def jump_vertical(cells, stride, i, step, target):
+    while True:
+        i += step
+        if cells[i]:
+            return -1
+        if i == target:
+            return i
+        if (not cells[i - 1] and cells[i - 1 - step]) or (not cells[i + 1] and cells[i + 1 - step]):
+            return i
+        if jump_horizontal(cells, stride, i, 1, target) >= 0 or jump_horizontal(cells, stride, i, -1, target) >= 0:
+            return i
+
+def pruned_directions(stride, node, parent):
+    if parent is None:
+        return (-1, 1, -stride, stride)
+    d = node - parent
+    if -stride < d < stride:
+        step = 1 if d > 0 else -1
+        return (step, -stride, stride)
+    step = stride if d > 0 else -stride
+    return (step, -1, 1)
+
+def expand_path(grid, jump_points):
+    stride = grid.stride
+    path = [grid.coords(jump_points[0])]
+    for a, b in zip(jump_points, jump_points[1:]):
+        if abs(b - a) < stride:
+            step = 1 if b > a else -1
+        else:
+            step = stride if b > a else -stride
+        while a != b:
+            a += step
+            path.append(grid.coords(a))
+    return path
+
+def search(grid, start, goal, successor, stats=None, on_expand=None):
+    if disconnected(grid, start, goal):
+        return []
+    stride = grid.stride
+    source, target = grid.index(*start), grid.index(*goal)
+    gx, gy = target % stride, target // stride
+    # Ties on f go to the deeper node (-g), which avoids fanning out across
+    # the many equal-cost jump points a Manhattan heuristic produces
+    open_set = [(abs(start[0] - goal[0]) + abs(start[1] - goal[1]), 0, source)]
+    came_from = {source: None}
+    g_score = {source: 0}
+    closed = set()
+    inf = float('inf')
+    pops = max_open = 0
+
+    while open_set:
+        if stats is not None:
+            pops += 1
+            max_open = max(max_open, len(open_set))
+        _, neg_g, current = heapq.heappop(open_set)
+        cost = -neg_g
+        if current in closed:
+            continue
+        closed.add(current)
+        if on_expand is not None:
+            on_expand(grid.coords(current))
+
+        if current == target:
+            if stats is not None:
+                record_search(stats, pops, max_open, open_set, closed, g_score)
+            jump_points = []
+            while current is not None:
+                jump_points.append(current)
+                current = came_from[current]
+            return expand_path(grid, jump_points[::-1])
+
+        cy, cx = divmod(current, stride)
+        for direction in pruned_directions(stride, current, came_from[current]):
+            jp = successor(current, direction, target)
+            if jp < 0:
+                continue
+            ny, nx = divmod(jp, stride)
+            tentative_g = cost + abs(nx - cx) + abs(ny - cy)
+            if tentative_g < g_score.get(jp, inf):
+                g_score[jp] = tentative_g
+                came_from[jp] = current
+                heapq.heappush(open_set, (tentative_g + abs(nx - gx) + abs(ny - gy), -tentative_g, jp))
+    if stats is not None:
+        record_search(stats, pops, max_open, open_set, closed, g_score)
+    return []
+
+def jps(grid, start, goal, stats=None, on_expand=None):
+    grid = as_compact(grid)
+    cells, stride = grid.cells, grid.stride
+
+    def successor(node, direction, target):
+        if -stride < direction < stride:
+            return jump_horizontal(cells, stride, node, direction, target)
+        return jump_vertical(cells, stride, node, direction, target)
+
+    return search(grid, start, goal, successor, stats, on_expand)
+
+
+class JumpTable:
+    # JPS+ preprocessing: per cell and direction, the number of free cells before a
+    # wall (run) and the distance to the first goal-independent jump point (jump, 0 if none).
+    # Directions are indexed as 0 = +x, 1 = -x, 2 = +y, 3 = -y.
+    def __init__(self, grid):
+        self.grid = grid
+        self.build()
+
+    def build(self):
+        grid = self.grid
+        a = grid.array()
+        free = a == 0
+        shape = free.shape
+        runs, jumps = [None] * 4, [None] * 4
+
+        up = np.zeros(shape, dtype=bool)
+        down = np.zeros(shape, dtype=bool)
+        up[1:, :] = free[:-1, :]
+        down[:-1, :] = free[1:, :]
+        left = np.zeros(shape, dtype=bool)
+        right = np.zeros(shape, dtype=bool)
+        left[:, 1:] = free[:, :-1]
+        right[:, :-1] = free[:, 1:]
+
+        # Entering a cell moving +x is forced if a vertical side opens up behind us
+        forced_east = np.zeros(shape, dtype=bool)
+        forced_east[:, 1:] = free[:, 1:] & ((up[:, 1:] & ~up[:, :-1]) | (down[:, 1:] & ~down[:, :-1]))
+        forced_west = np.zeros(shape, dtype=bool)
+        forced_west[:, :-1] = free[:, :-1] & ((up[:, :-1] & ~up[:, 1:]) | (down[:, :-1] & ~down[:, 1:]))
+        runs[0], jumps[0] = self.scan(free, forced_east, axis=1, forward=True)
+        runs[1], jumps[1] = self.scan(free, forced_west, axis=1, forward=False)
+
+        has_horizontal = free & ((jumps[0] > 0) | (jumps[1] > 0))
+        forced_south = np.zeros(shape, dtype=bool)
+        forced_south[1:, :] = free[1:, :] & ((left[1:, :] & ~left[:-1, :]) | (right[1:, :] & ~right[:-1, :]))
+        forced_north = np.zeros(shape, dtype=bool)
+        forced_north[:-1, :] = free[:-1, :] & ((left[:-1, :] & ~left[1:, :]) | (right[:-1, :] & ~right[1:, :]))
+        runs[2], jumps[2] = self.scan(free, forced_south | has_horizontal, axis=0, forward=True)
+        runs[3], jumps[3] = self.scan(free, forced_north | has_horizontal, axis=0, forward=False)
+
+        self.runs = [array('i', r.astype(np.int32).ravel().tobytes()) for r in runs]
+        self.jumps = [array('i', j.astype(np.int32).ravel().tobytes()) for j in jumps]
+        self.version = grid.version
+
+    @staticmethod
+    def scan(free, marks, axis, forward):
+        # Distance from each cell to the nearest wall / mark strictly ahead along axis
+        n = free.shape[axis]
+        pos = np.arange(n).reshape((1, n) if axis == 1 else (n, 1))
+        pos = np.broadcast_to(pos, free.shape)
+        if forward:
+            walls = np.where(free, n, pos)
+            hits = np.where(marks, pos, n)
+            nearest_wall = np.flip(np.minimum.accumulate(np.flip(walls, axis), axis=axis), axis)
+            nearest_hit = np.flip(np.minimum.accumulate(np.flip(hits, axis), axis=axis), axis)
+            ahead = [slice(None)] * 2
+            ahead[axis] = slice(1, None)
+            wall_ahead = np.full(free.shape, n)
+            hit_ahead = np.full(free.shape, n)
+            behind = [slice(None)] * 2
+            behind[axis] = slice(None, -1)
+            wall_ahead[tuple(behind)] = nearest_wall[tuple(ahead)]
+            hit_ahead[tuple(behind)] = nearest_hit[tuple(ahead)]
+            run = wall_ahead - pos - 1
+            jump = np.where(hit_ahead < wall_ahead, hit_ahead - pos, 0)
+        else:
+            walls = np.where(free, -1, pos)
+            hits = np.where(marks, pos, -1)
+            nearest_wall = np.maximum.accumulate(walls, axis=axis)
+            nearest_hit = np.maximum.accumulate(hits, axis=axis)
+            ahead = [slice(None)] * 2
+            ahead[axis] = slice(None, -1)
+            behind = [slice(None)] * 2
+            behind[axis] = slice(1, None)
+            wall_ahead = np.full(free.shape, -1)
+            hit_ahead = np.full(free.shape, -1)
+            wall_ahead[tuple(behind)] = nearest_wall[tuple(ahead)]
+            hit_ahead[tuple(behind)] = nearest_hit[tuple(ahead)]
+            run = pos - wall_ahead - 1
+            jump = np.where(hit_ahead > wall_ahead, pos - hit_ahead, 0)
+        run = np.where(free, run, 0)
+        jump = np.where(free, jump, 0)
+        return run, jump
+
+
+def jump_table(grid):
+    # One table per grid, kept on the grid and rebuilt whenever its version has moved on
+    table = grid.caches.get('jump_table')
+    if table is None or table.version != grid.version:
+        table = grid.caches['jump_table'] = JumpTable(grid)
+    return table
+
+def jps_plus(grid, start, goal, stats=None, on_expand=None):
+    grid = as_compact(grid)
+    stride = grid.stride
+    table = jump_table(grid)
+    runs, jumps = table.runs, table.jumps
+    tx, ty = goal[0] + 1, goal[1] + 1
+
+    def successor(node, direction, target):
+        y, x = divmod(node, stride)
+        if direction == 1 or direction == -1:
+            k = 0 if direction == 1 else 1
+            run, jump = runs[k][node], jumps[k][node]
+            limit = jump if jump else run
+            if y == ty and 0 < (tx - x) * direction <= limit:
+                return target
+            return node + jump * direction if jump else -1
+
+        k, sign = (2, 1) if direction > 0 else (3, -1)
+        run, jump = runs[k][node], jumps[k][node]
+        limit = jump if jump else run
+        if x == tx and 0 < (ty - y) * sign <= limit:
+            return target
+        steps = (ty - y) * sign
+        if 0 < steps <= limit:
+            # The goal's row: stop here if a horizontal jump from this cell would see the goal
+            cell = node + steps * direction
+            towards = 0 if tx > x else 1
+            if runs[towards][cell] >= abs(tx - x):
+                return cell
+        return node + jump * direction if jump else -1
+
+    return search(grid, start, goal, successor, stats, on_expand)
@@ -0,0 +1,187 @@
+# algorithms/multi_agent.py
+import heapq
+from algorithms.distance_field import DistanceFieldCache, UNREACHED
+from grid_env import as_compact
+
+# Passes that move failed agents to the front before they are given up on
+REORDER_ROUNDS = 3
+
+
+class ReservationTable:
+    # Space-time reservations of the agents planned so far, as sets of packed ints: a vertex
+    # (cell, t) is t * span + cell and a move a -> b leaving at t is (t * span + a) * span + b,
+    # with span the length of the padded cell buffer. An agent that reached its goal stays
+    # there, so parked[cell] is the time from which the cell is taken for good.
+    def __init__(self, span):
+        self.span = span
+        self.vertices = set()
+        self.edges = set()
+        self.parked = {}
+        self.last_use = {}
+        self.makespan = 0
+
+    def vertex_blocked(self, cell, t):
+        if t * self.span + cell in self.vertices:
+            return True
+        parked = self.parked.get(cell)
+        return parked is not None and t >= parked
+
+    def edge_blocked(self, a, b, t):
+        # Moving a -> b between t and t + 1 swaps places with anyone moving b -> a
+        return (t * self.span + b) * self.span + a in self.edges
+
+    def free_from(self, cell):
+        # Earliest time an agent may stop at cell for good without being run over later
+        return self.last_use.get(cell, -1) + 1
+
+    def reserve(self, route):
+        # route: cell indices, one per time step from t = 0
+        span = self.span
+        for t, cell in enumerate(route):
+            self.vertices.add(t * span + cell)
+            if t > self.last_use.get(cell, -1):
+                self.last_use[cell] = t
+        for t in range(len(route) - 1):
+            a, b = route[t], route[t + 1]
+            if a != b:
+                self.edges.add((t * span + a) * span + b)
+        self.parked[route[-1]] = len(route) - 1
+        self.makespan = max(self.makespan, len(route) - 1)
+
+
+def space_time_astar(grid, source, target, dist, table, horizon, max_expansions):
+    # A* over (cell, t) with unit moves and waits, avoiding every reservation. h is the goal's
+    # exact distance, raised to the wait left when the goal is still in use until later:
+    # without that, every state before then ties and the search floods the whole map.
+    # Returns (route as cell indices per time step or [], expansions).
+    cells, offsets = grid.cells, grid.neighbor_offsets
+    span = table.span
+    if dist[source] == UNREACHED or table.vertex_blocked(source, 0):
+        return [], 0
+    finish = table.free_from(target)
+    moves = (0,) + tuple(offsets)
+    parent = {source: None}
+    # (f, -t, cell): among equal f, the deepest state first
+    open_set = [(max(dist[source], finish), 0, source)]
+    expansions = 0
+    while open_set:
+        _, neg_t, cell = heapq.heappop(open_set)
+        t = -neg_t
+        if cell == target and t >= finish:
+            route, key = [], t * span + cell
+            while key is not None:
+                route.append(key % span)
+                key = parent[key]
+            return route[::-1], expansions
+        if expansions >= max_expansions:
+            break
+        expansions += 1
+        nt = t + 1
+        base = nt * span
+        for move in moves:
+            n = cell + move
+            if cells[n] or base + n in parent:
+                continue
+            h = dist[n]
+            if h == UNREACHED or nt + h > horizon or table.vertex_blocked(n, nt):
+                continue
+            if move and table.edge_blocked(cell, n, t):
+                continue
+            parent[base + n] = t * span + cell
+            heapq.heappush(open_set, (max(nt + h, finish), -nt, n))
+    return [], expansions
+
+
+class FleetPlanner:
+    # Prioritised planning: agents are planned one at a time, longest distance first, each
+    # around the reservations of those before it, so the paths never share a cell at the
+    # same time or swap along an edge. Distance fields per goal double as exact heuristics
+    # and are kept across batches, repaired in place when subscribed to the environment.
+    def __init__(self, grid, max_fields=1024):
+        self.grid = as_compact(grid)
+        self.fields = DistanceFieldCache(self.grid, max_fields)
+
+    def apply_changes(self, changed):
+        self.fields.apply_changes(changed)
+
+    def plan(self, pairs, slack=None, max_expansions=200000, stats=None):
+        # pairs: [(start, goal)] with distinct starts and distinct goals. Returns one path per
+        # pair, a cell per time step (waits repeat the cell), [] where an agent found none;
+        # such an agent stays on its start, and every other path is planned around it.
+        starts = [start for start, _ in pairs]
+        goals = [goal for _, goal in pairs]
+        if len(set(starts)) != len(starts) or len(set(goals)) != len(goals):
+            raise ValueError("agents need distinct starts and distinct goals")
+        grid = self.grid
+        if slack is None:
+            slack = (grid.width + grid.height) // 2
+        sources = [grid.index(*start) for start in starts]
+        fields = [self.fields.get(goal) for goal in goals]
+        order = sorted(range(len(pairs)), key=lambda i: -fields[i].distance(starts[i]))
+        # Agents that fail are moved to the front for a few passes; those still failing after
+        # that are parked on their start from t = 0 and the rest is planned again around
+        # them, until a pass adds no new failure
+        stuck = set()
+        expanded = 0
+        for attempt in range(REORDER_ROUNDS + len(pairs) + 1):
+            table = ReservationTable(len(grid.cells))
+            for i in stuck:
+                table.reserve([sources[i]])
+            paths = [[] for _ in pairs]
+            failed = []
+            for i in order:
+                if i in stuck:
+                    continue
+                source, target = sources[i], grid.index(*goals[i])
+                dist = fields[i].dist
+                horizon = max(table.makespan, 0 if dist[source] == UNREACHED else dist[source]) + slack
+                route, expansions = space_time_astar(grid, source, target, dist, table, horizon, max_expansions)
+                expanded += expansions
+                if not route:
+                    failed.append(i)
+                    route = [source]
+                else:
+                    paths[i] = [grid.coords(cell) for cell in route]
+                table.reserve(route)
+            if not failed:
+                break
+            if attempt < REORDER_ROUNDS:
+                order = failed + [i for i in order if i not in failed]
+            else:
+                stuck.update(failed)
+        if stats is not None:
+            stats['expanded'] = stats.get('expanded', 0) + expanded
+            stats['failed'] = stats.get('failed', 0) + len(stuck)
+            stats['makespan'] = max(stats.get('makespan', 0), table.makespan)
+        return paths
+
+
+def find_conflicts(paths, starts=None):
+    # (t, kind, agent a, agent b) for every vertex or swap conflict, agents holding their
+    # last cell once they arrive. An empty path is an agent that stays on its start when
+    # starts are given, and is skipped otherwise.
+    if starts is not None:
+        paths = [path or [start] for path, start in zip(paths, starts)]
+    agents = [(i, path) for i, path in enumerate(paths) if path]
+    makespan = max((len(path) for _, path in agents), default=0)
+    conflicts = []
+    for t in range(makespan):
+        where = {}
+        for i, path in agents:
+            cell = path[min(t, len(path) - 1)]
+            if cell in where:
+                conflicts.append((t, 'vertex', where[cell], i))
+            where[cell] = i
+        if t + 1 < makespan:
+            for i, path in agents:
+                a, b = path[min(t, len(path) - 1)], path[min(t + 1, len(path) - 1)]
+                j = where.get(b)
+                if a != b and j is not None and j != i:
+                    other = paths[j]
+                    if other[min(t + 1, len(other) - 1)] == a and i < j:
+                        conflicts.append((t, 'swap', i, j))
+    return conflicts
+
+
+def plan_fleet(grid, pairs, stats=None, **kwargs):
+    return FleetPlanner(grid).plan(pairs, stats=stats, **kwargs)
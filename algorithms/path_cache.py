@@ -0,0 +1,103 @@
+# algorithms/path_cache.py
+from collections import OrderedDict, defaultdict
+from algorithms.theta_star import trace_path
+from grid_env import as_compact
+
+
+class PathCache:
+    # (start, goal, algorithm) -> path for the grid's current version, least recently used
+    # first. Subscribe apply_changes to GridEnvironment: new obstacles only evict the paths
+    # they land on (every other path stays valid and optimal, since costs can only go up),
+    # while freed cells may open shorter routes and drop everything.
+    def __init__(self, grid, maxsize=256):
+        self.grid = as_compact(grid)
+        self.maxsize = maxsize
+        self.paths = OrderedDict()
+        # cell index -> keys of the cached paths that pass through it
+        self.users = defaultdict(set)
+        self.cells = {}
+        self.version = self.grid.version
+        self.hits = self.misses = self.evicted = self.invalidated = 0
+
+    def key(self, start, goal, algo_name):
+        return (tuple(start), tuple(goal), algo_name)
+
+    def path_cells(self, path):
+        # Grid steps and any-angle segments alike, rasterised the way line of sight checks them
+        return set(trace_path(self.grid, path))
+
+    def get(self, start, goal, algo_name):
+        # The cached path (possibly [] for an unreachable goal) or None on a miss
+        self.sync()
+        key = self.key(start, goal, algo_name)
+        path = self.paths.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.paths.move_to_end(key)
+        return list(path)
+
+    def put(self, start, goal, algo_name, path, version=None):
+        # version: the grid version the path was planned on; stale results are not stored
+        self.sync()
+        if version is not None and version != self.version:
+            return False
+        key = self.key(start, goal, algo_name)
+        self.discard(key)
+        self.paths[key] = list(path)
+        self.cells[key] = cells = self.path_cells(path)
+        for i in cells:
+            self.users[i].add(key)
+        if len(self.paths) > self.maxsize:
+            self.discard(next(iter(self.paths)))
+            self.evicted += 1
+        return True
+
+    def plan(self, algo_name, algo, start, goal, **kwargs):
+        path = self.get(start, goal, algo_name)
+        if path is None:
+            version = self.version
+            path = algo(self.grid, start, goal, **kwargs)
+            self.put(start, goal, algo_name, path, version)
+        return path
+
+    def discard(self, key):
+        if self.paths.pop(key, None) is None:
+            return
+        for i in self.cells.pop(key):
+            users = self.users[i]
+            users.discard(key)
+            if not users:
+                del self.users[i]
+
+    def clear(self):
+        self.invalidated += len(self.paths)
+        self.paths.clear()
+        self.users.clear()
+        self.cells.clear()
+        self.version = self.grid.version
+
+    def sync(self):
+        # The grid moved without apply_changes seeing it, so nothing cached can be trusted
+        if self.version != self.grid.version:
+            self.clear()
+
+    def apply_changes(self, changed):
+        if self.version != self.grid.version - 1:
+            self.clear()
+            return
+        grid = self.grid
+        indices = [grid.index(x, y) for x, y in changed]
+        if any(not grid.cells[i] for i in indices):
+            self.clear()
+            return
+        for i in indices:
+            for key in list(self.users.get(i, ())):
+                self.discard(key)
+                self.invalidated += 1
+        self.version = grid.version
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.paths),
+                'evicted': self.evicted, 'invalidated': self.invalidated}
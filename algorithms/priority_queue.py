@@ -0,0 +1,74 @@
+# algorithms/priority_queue.py
+import heapq
+import itertools
+
+_REMOVED = object()
+
+
+class IndexedPriorityQueue:
+    # Binary heap with an item -> entry map. Updates and removals mark the old
+    # entry stale instead of searching the heap, stale entries are skipped on pop.
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+        # Running totals for search statistics
+        self.pushes = 0
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def __contains__(self, item):
+        return item in self.entries
+
+    def push(self, item, key):
+        entry = self.entries.get(item)
+        if entry is not None:
+            if entry[0] == key:
+                return
+            entry[2] = _REMOVED
+        entry = [key, next(self.counter), item]
+        self.entries[item] = entry
+        heapq.heappush(self.heap, entry)
+        self.pushes += 1
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self._compact()
+
+    def remove(self, item):
+        entry = self.entries.pop(item)
+        entry[2] = _REMOVED
+
+    def discard(self, item):
+        if item in self.entries:
+            self.remove(item)
+
+    def key(self, item):
+        return self.entries[item][0]
+
+    def top_key(self):
+        self._prune()
+        return self.heap[0][0]
+
+    def top(self):
+        self._prune()
+        return self.heap[0][2]
+
+    def pop(self):
+        self._prune()
+        key, _, item = heapq.heappop(self.heap)
+        del self.entries[item]
+        return key, item
+
+    def _prune(self):
+        heap = self.heap
+        while heap and heap[0][2] is _REMOVED:
+            heapq.heappop(heap)
+            self.stale += 1
+
+    def _compact(self):
+        self.heap = [entry for entry in self.heap if entry[2] is not _REMOVED]
+        heapq.heapify(self.heap)
@@ -0,0 +1,96 @@
+# algorithms/search_context.py
+import mmap
+import weakref
+from contextlib import contextmanager
+import numpy as np
+
+# Stamps are 32-bit: 2 * generation marks a cell seen (its g and parent are set) during the
+# current query, 2 * generation + 1 marks it closed
+MAX_GENERATION = (1 << 31) - 1
+# Idle contexts a pool keeps per grid; a burst beyond this allocates and drops the extras
+MAX_IDLE = 4
+# Bytes of search state lent out by all pools right now, and the most at once since
+# reset_borrowed_peak(). tracemalloc cannot see the mmaps, so memory figures add the peak.
+_borrowed = {'current': 0, 'peak': 0}
+
+
+def zeroed(nbytes, fmt):
+    # Anonymous mapping: zero pages the OS only commits once a search writes to them, where a
+    # bytearray would be memset, and so committed, up front
+    return memoryview(mmap.mmap(-1, nbytes)).cast(fmt)
+
+
+class SearchContext:
+    # g, parent and stamp arrays indexed like a grid's padded buffer, reused across queries.
+    # Entries only count when their stamp belongs to the current generation, so starting
+    # a query is a counter bump rather than clearing or reallocating anything. A search only
+    # touches the pages around the cells it reaches, so that is all a context commits.
+    def __init__(self, size):
+        self.size = size
+        self.g = zeroed(8 * size, 'd')
+        self.parent = zeroed(4 * size, 'i')
+        self.stamp = zeroed(4 * size, 'I')
+        self.generation = 0
+        self.nbytes = 16 * size
+
+    def begin(self):
+        # Returns the seen mark for the new query; closed cells are stamped with mark + 1
+        self.generation += 1
+        if self.generation > MAX_GENERATION:
+            self.stamp = zeroed(4 * self.size, 'I')
+            self.generation = 1
+        return 2 * self.generation
+
+    def counts(self, mark):
+        # (closed, seen) for the query stamped with mark; a scan, so only used for stats
+        stamps = np.frombuffer(self.stamp, dtype=np.uint32)
+        closed = int(np.count_nonzero(stamps == mark + 1))
+        return closed, closed + int(np.count_nonzero(stamps == mark))
+
+
+class ContextPool:
+    # Idle contexts for grids of one size. Each query takes its own, so concurrent
+    # searches on the same grid never share state. At most max_idle contexts are kept
+    # for reuse, however many searches once ran at the same time.
+    def __init__(self, size, max_idle=MAX_IDLE):
+        self.size = size
+        self.max_idle = max_idle
+        self.idle = []
+        self.created = 0
+
+    @contextmanager
+    def context(self):
+        try:
+            ctx = self.idle.pop()
+        except IndexError:
+            ctx = SearchContext(self.size)
+            self.created += 1
+        _borrowed['current'] += ctx.nbytes
+        _borrowed['peak'] = max(_borrowed['peak'], _borrowed['current'])
+        try:
+            yield ctx
+        finally:
+            _borrowed['current'] -= ctx.nbytes
+            if len(self.idle) < self.max_idle:
+                self.idle.append(ctx)
+
+
+_pools = weakref.WeakKeyDictionary()
+
+def context_pool(grid):
+    pool = _pools.get(grid)
+    if pool is None:
+        pool = _pools[grid] = ContextPool(len(grid.cells))
+    return pool
+
+def search_context(grid):
+    # with search_context(grid) as ctx: ... borrows a context sized to grid
+    return context_pool(grid).context()
+
+
+def reset_borrowed_peak():
+    _borrowed['peak'] = _borrowed['current']
+
+def borrowed_peak():
+    # Reserved bytes, not committed ones: a search only commits the pages it touches
+    return _borrowed['peak']
@@ -0,0 +1,30 @@
+# algorithms/stats.py
+# Opt-in search counters. Planners take stats=None or a dict that counts are added into;
+# anything derivable from the final search state is computed once at the end instead of per step.
+COUNTERS = ('expanded', 'pushes', 'pops', 'stale', 'reopened', 'los_checks', 'update_vertex', 'max_open')
+
+
+def record(stats, max_open=0, **counts):
+    for key, value in counts.items():
+        stats[key] = stats.get(key, 0) + value
+    stats['max_open'] = max(stats.get('max_open', 0), max_open)
+
+
+def counting(stats, key, func):
+    # func wrapped to count its calls into stats[key]; only built when stats are on
+    def wrapper(*args):
+        stats[key] = stats.get(key, 0) + 1
+        return func(*args)
+    return wrapper
+
+
+def record_search(stats, pops, max_open, open_set, closed, g_score):
+    # Heap searches with a closed set: every pop is an expansion or a stale entry, every
+    # push is still queued or was popped, and pushes beyond one per seen node were re-openings
+    record_counts(stats, pops, max_open, len(open_set), len(closed), len(g_score))
+
+
+def record_counts(stats, pops, max_open, queued, expanded, seen):
+    pushes = pops + queued
+    record(stats, max_open, expanded=expanded, pushes=pushes, pops=pops,
+           stale=pops - expanded, reopened=pushes - seen)
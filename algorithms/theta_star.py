@@ -1,66 +1,246 @@
 # algorithms/theta_star.py
 import heapq
-from collections import defaultdict
 import math
+from algorithms.search_context import search_context
+from algorithms.stats import counting, record_counts
+from grid_env import as_compact, disconnected
 
 def heuristic(a, b):
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def line_of_sight(grid, s0, s1):
-    x0, y0 = s0
-    x1, y1 = s1
+def cell_line_of_sight(cells, stride, a, b):
+    # Cells from index a up to (not including) b of a padded grid, stopping at the first obstacle
+    y0, x0 = divmod(a, stride)
+    y1, x1 = divmod(b, stride)
+    # Axis-aligned sight lines are a single C-level scan of the buffer
+    if y0 == y1:
+        return 1 not in (cells[a:b] if b > a else cells[b + 1:a + 1])
+    if x0 == x1:
+        return 1 not in (cells[a:b:stride] if b > a else cells[b + stride:a + 1:stride])
     dx = abs(x1 - x0)
     dy = abs(y1 - y0)
     sx = 1 if x1 > x0 else -1
-    sy = 1 if y1 > y0 else -1
+    sy = stride if y1 > y0 else -stride
     err = dx - dy
-    while (x0, y0) != (x1, y1):
-        if grid[y0][x0]:
+    i = a
+    while i != b:
+        if cells[i]:
             return False
         e2 = 2 * err
         if e2 > -dy:
             err -= dy
-            x0 += sx
+            i += sx
         if e2 < dx:
             err += dx
-            y0 += sy
+            i += sy
     return True
 
-def theta_star(grid, start, goal):
-    width, height = len(grid[0]), len(grid)
-    open_set = []
-    heapq.heappush(open_set, (0 + heuristic(start, goal), start))
-    came_from = {start: start}
-    g_score = defaultdict(lambda: float('inf'))
-    g_score[start] = 0
+def segment_cells(stride, a, b):
+    # Every cell index cell_line_of_sight visits between a and b, both ends included
+    y0, x0 = divmod(a, stride)
+    y1, x1 = divmod(b, stride)
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    sx = 1 if x1 > x0 else -1
+    sy = stride if y1 > y0 else -stride
+    err = dx - dy
+    cells = [a]
+    i = a
+    while i != b:
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            i += sx
+        if e2 < dx:
+            err += dx
+            i += sy
+        cells.append(i)
+    return cells
+
+def trace_path(grid, path):
+    # Cell indices a path covers in travel order, any-angle segments rasterised like segment_cells
+    indices = [grid.index(*cell) for cell in path]
+    cells = indices[:1]
+    for a, b in zip(indices, indices[1:]):
+        cells.extend(segment_cells(grid.stride, a, b)[1:])
+    return cells
+
+def line_of_sight(grid, s0, s1):
+    grid = as_compact(grid)
+    return cell_line_of_sight(grid.cells, grid.stride, grid.index(*s0), grid.index(*s1))
+
+
+class LineOfSightCache:
+    # Results keyed by the (parent, cell) index pair, dropped whenever the grid version moves.
+    # The pair is packed into one int: tuple keys kept alive here are what the cyclic GC
+    # would otherwise keep scanning under sustained query load.
+    def __init__(self, grid, maxsize=1 << 20):
+        self.grid = grid
+        self.span = len(grid.cells)
+        self.maxsize = maxsize
+        self.results = {}
+        self.version = grid.version
+
+    def check(self, a, b):
+        if self.version != self.grid.version:
+            self.results.clear()
+            self.version = self.grid.version
+        key = a * self.span + b
+        result = self.results.get(key)
+        if result is None:
+            if len(self.results) >= self.maxsize:
+                self.results.clear()
+            result = self.results[key] = cell_line_of_sight(self.grid.cells, self.grid.stride, a, b)
+        return result
+
+
+def los_cache(grid):
+    cache = grid.caches.get('line_of_sight')
+    if cache is None:
+        cache = grid.caches['line_of_sight'] = LineOfSightCache(grid)
+    return cache
+
+def reconstruct(grid, came_from, current):
+    path = []
+    while current != came_from[current]:
+        path.append(grid.coords(current))
+        current = came_from[current]
+    path.append(grid.coords(current))
+    return path[::-1]
+
+def theta_star(grid, start, goal, stats=None, on_expand=None):
+    grid = as_compact(grid)
+    if disconnected(grid, start, goal):
+        return []
+    sight = los_cache(grid).check
+    if stats is not None:
+        sight = counting(stats, 'los_checks', sight)
+    source, target = grid.index(*start), grid.index(*goal)
+    with search_context(grid) as ctx:
+        return _theta_star(ctx, grid, source, target, sight, stats, on_expand)
+
+def _theta_star(ctx, grid, source, target, sight, stats, on_expand):
+    # Same stamp scheme as A*: g and parent count from seen on, closed is seen + 1
+    cells, stride = grid.cells, grid.stride
+    offsets = grid.neighbor_offsets
+    gx, gy = target % stride, target // stride
+    g_score, came_from, stamp = ctx.g, ctx.parent, ctx.stamp
+    seen = ctx.begin()
+    closed = seen + 1
+    g_score[source] = 0
+    came_from[source] = source
+    stamp[source] = seen
+    open_set = [(abs(source % stride - gx) + abs(source // stride - gy), source)]
+    pops = max_open = 0
+
+    while open_set:
+        if stats is not None:
+            pops += 1
+            max_open = max(max_open, len(open_set))
+        _, current = heapq.heappop(open_set)
+        if stamp[current] == closed:
+            continue
+        stamp[current] = closed
+        if on_expand is not None:
+            on_expand(grid.coords(current))
+        if current == target:
+            if stats is not None:
+                record_counts(stats, pops, max_open, len(open_set), *ctx.counts(seen))
+            return reconstruct(grid, came_from, current)
+
+        parent = came_from[current]
+        py, px = divmod(parent, stride)
+        for offset in offsets:
+            neighbor = current + offset
+            if cells[neighbor] or stamp[neighbor] == closed:
+                continue
+            ny, nx = divmod(neighbor, stride)
+            if sight(parent, neighbor):
+                tentative_g = g_score[parent] + math.hypot(nx - px, ny - py)
+                if stamp[neighbor] < seen or tentative_g < g_score[neighbor]:
+                    g_score[neighbor] = tentative_g
+                    came_from[neighbor] = parent
+                    stamp[neighbor] = seen
+                    f = tentative_g + abs(nx - gx) + abs(ny - gy)
+                    heapq.heappush(open_set, (f, neighbor))
+            else:
+                tentative_g = g_score[current] + 1
+                if stamp[neighbor] < seen or tentative_g < g_score[neighbor]:
+                    g_score[neighbor] = tentative_g
+                    came_from[neighbor] = current
+                    stamp[neighbor] = seen
+                    f = tentative_g + abs(nx - gx) + abs(ny - gy)
+                    heapq.heappush(open_set, (f, neighbor))
+    if stats is not None:
+        record_counts(stats, pops, max_open, len(open_set), *ctx.counts(seen))
+    return []
+
+def lazy_theta_star(grid, start, goal, stats=None, on_expand=None):
+    # Lazy Theta*: assume every neighbour sees the current parent and only check
+    # line of sight once a vertex is expanded, falling back to its best closed neighbour.
+    grid = as_compact(grid)
+    if disconnected(grid, start, goal):
+        return []
+    sight = los_cache(grid).check
+    if stats is not None:
+        sight = counting(stats, 'los_checks', sight)
+    source, target = grid.index(*start), grid.index(*goal)
+    with search_context(grid) as ctx:
+        return _lazy_theta_star(ctx, grid, source, target, sight, stats, on_expand)
+
+def _lazy_theta_star(ctx, grid, source, target, sight, stats, on_expand):
+    cells, stride = grid.cells, grid.stride
+    offsets = grid.neighbor_offsets
+    gx, gy = target % stride, target // stride
+    g_score, came_from, stamp = ctx.g, ctx.parent, ctx.stamp
+    seen = ctx.begin()
+    closed = seen + 1
+    g_score[source] = 0
+    came_from[source] = source
+    stamp[source] = seen
+    open_set = [(abs(source % stride - gx) + abs(source // stride - gy), source)]
+    inf = float('inf')
+    pops = max_open = 0
 
     while open_set:
+        if stats is not None:
+            pops += 1
+            max_open = max(max_open, len(open_set))
         _, current = heapq.heappop(open_set)
-        if current == goal:
-            path = []
-            while current != came_from[current]:
-                path.append(current)
-                current = came_from[current]
-            path.append(start)
-            return path[::-1]
-
-        for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
-            neighbor = (current[0]+dx, current[1]+dy)
-            if 0 <= neighbor[0] < width and 0 <= neighbor[1] < height:
-                if grid[neighbor[1]][neighbor[0]] == 1:
-                    continue
-                if line_of_sight(grid, came_from[current], neighbor):
-                    tentative_g = g_score[came_from[current]] + math.dist(came_from[current], neighbor)
-                    if tentative_g < g_score[neighbor]:
-                        g_score[neighbor] = tentative_g
-                        came_from[neighbor] = came_from[current]
-                        f = tentative_g + heuristic(neighbor, goal)
-                        heapq.heappush(open_set, (f, neighbor))
-                else:
-                    tentative_g = g_score[current] + 1
-                    if tentative_g < g_score[neighbor]:
-                        g_score[neighbor] = tentative_g
-                        came_from[neighbor] = current
-                        f = tentative_g + heuristic(neighbor, goal)
-                        heapq.heappush(open_set, (f, neighbor))
+        if stamp[current] == closed:
+            continue
+        parent = came_from[current]
+        if parent != current and not sight(parent, current):
+            best = inf
+            for offset in offsets:
+                s = current + offset
+                if stamp[s] == closed and g_score[s] + 1 < best:
+                    best = g_score[s] + 1
+                    parent = s
+            came_from[current] = parent
+            g_score[current] = best
+        stamp[current] = closed
+        if on_expand is not None:
+            on_expand(grid.coords(current))
+        if current == target:
+            if stats is not None:
+                record_counts(stats, pops, max_open, len(open_set), *ctx.counts(seen))
+            return reconstruct(grid, came_from, current)
+
+        py, px = divmod(parent, stride)
+        base = g_score[parent]
+        for offset in offsets:
+            neighbor = current + offset
+            if cells[neighbor] or stamp[neighbor] == closed:
+                continue
+            ny, nx = divmod(neighbor, stride)
+            tentative_g = base + math.hypot(nx - px, ny - py)
+            if stamp[neighbor] < seen or tentative_g < g_score[neighbor]:
+                g_score[neighbor] = tentative_g
+                came_from[neighbor] = parent
+                stamp[neighbor] = seen
+                f = tentative_g + abs(nx - gx) + abs(ny - gy)
+                heapq.heappush(open_set, (f, neighbor))
+    if stats is not None:
+        record_counts(stats, pops, max_open, len(open_set), *ctx.counts(seen))
     return []
@@ -0,0 +1,176 @@
+# benchmark.py
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from config import OBSTACLES_PER_STEP, BASE_SEED
+from grid_env import MAP_GENERATORS
+from runner import ALGORITHMS, INCREMENTAL_PLANNERS, MAX_ATTEMPTS, build_environment, parse_size
+from utils.metrics import benchmark
+
+SCENARIOS = ('plan', 'replan', 'queries')
+
+
+def plan_case(env, start, goal, algo_name):
+    # Fresh copy of the map per trial, so per-grid caches (line of sight, jump tables) start cold
+    def setup():
+        grid = env.grid.copy()
+        # The copy is never mutated, so the original's component labels stay valid for it
+        grid.connectivity = env.connectivity
+        return grid, start, goal
+    return ALGORITHMS[algo_name], setup
+
+
+def replan_case(seed, size, density, algo_name, per_step, generator='uniform'):
+    # The same map, planned once untimed, then timed on the replan after one batch of obstacles
+    width, height = size
+
+    def setup():
+        env, start, goal = build_environment(seed, width, height, density, 0, generator)
+        if algo_name in INCREMENTAL_PLANNERS:
+            planner = INCREMENTAL_PLANNERS[algo_name](env.grid, start, goal)
+            planner.replan()
+            return planner, env.add_dynamic_obstacles(per_step)
+        # Planners that keep per-grid state (HPA*'s hierarchy) then pay only for the update
+        ALGORITHMS[algo_name](env.grid, start, goal)
+        env.add_dynamic_obstacles(per_step)
+        return env.grid, start, goal
+
+    if algo_name in INCREMENTAL_PLANNERS:
+        return (lambda planner, changed: planner.replan(changed)), setup
+    return ALGORITHMS[algo_name], setup
+
+
+def queries_case(env, algo_name, count, seed):
+    # Sustained load: a batch of random connected queries on one shared grid, so per-grid
+    # state (search contexts, line of sight results) stays warm from trial to trial.
+    # None when MAX_ATTEMPTS draws per query do not turn up enough connected pairs.
+    rng = np.random.default_rng(seed)
+    free = env.free_cells()
+    if len(free) < 2:
+        return None
+    pairs = []
+    for _ in range(MAX_ATTEMPTS * count):
+        a, b = (divmod(int(i), env.width)[::-1] for i in rng.choice(free, size=2, replace=False))
+        if env.connectivity.connected(a, b):
+            pairs.append((a, b))
+            if len(pairs) == count:
+                break
+    if len(pairs) < count:
+        return None
+    algo = ALGORITHMS[algo_name]
+
+    def run(grid, pairs):
+        path = []
+        for start, goal in pairs:
+            path = algo(grid, start, goal)
+        return path
+    return run, lambda: (env.grid, pairs)
+
+
+def case_key(scenario, algo_name, size, density, generator='uniform'):
+    # Uniform maps keep the original key, so older baselines still line up
+    name = f"{scenario}/{algo_name}/{size[0]}x{size[1]}/{density}"
+    return name if generator == 'uniform' else f"{name}/{generator}"
+
+
+def count_expansions(func, setup):
+    # Separate untimed call, so the counters never weigh on the timings
+    stats = {}
+    func(*setup(), stats=stats)
+    return stats.get('expanded')
+
+
+def run_sweep(args):
+    results = {}
+    for size in args.sizes:
+        for density in args.densities:
+            env, start, goal = build_environment(args.seed, size[0], size[1], density, 0, args.generator)
+            if env is None:
+                print(f"{size[0]}x{size[1]} @ {density}: no connected map, skipped")
+                continue
+            for scenario in args.scenarios:
+                for algo_name in args.algorithms:
+                    if scenario == 'plan':
+                        func, setup = plan_case(env, start, goal, algo_name)
+                    elif scenario == 'queries':
+                        case = queries_case(env, algo_name, args.queries, args.seed)
+                        if case is None:
+                            print(f"{case_key(scenario, algo_name, size, density, args.generator)}: "
+                                  f"not enough connected pairs, skipped")
+                            continue
+                        func, setup = case
+                    else:
+                        func, setup = replan_case(args.seed, size, density, algo_name, args.obstacles_per_step,
+                                                  args.generator)
+                    path, stats = benchmark(func, setup, warmup=args.warmup, repeats=args.repeats, memory=args.memory)
+                    stats['path_length'] = len(path) if path else 0
+                    stats['expanded'] = count_expansions(func, setup) if scenario == 'plan' else None
+                    key = case_key(scenario, algo_name, size, density, args.generator)
+                    results[key] = stats
+                    memory = f"  peak {stats['peak_kb']:.1f}KB" if stats['peak_kb'] is not None else ""
+                    expanded = f"  expanded {stats['expanded']}" if stats['expanded'] is not None else ""
+                    print(f"{key:<36} median {stats['median_ns'] / 1e6:9.3f}ms  "
+                          f"p10 {stats['p10_ns'] / 1e6:9.3f}ms  p90 {stats['p90_ns'] / 1e6:9.3f}ms  "
+                          f"len {stats['path_length']}{expanded}{memory}", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # A case regresses when its median is slower than the baseline median by more than
+    # the tolerance and also slower than the baseline's own p90 (i.e. outside its noise)
+    regressions = []
+    for key, stats in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        limit = max(base['median_ns'] * (1 + tolerance), base['p90_ns'])
+        if stats['median_ns'] > limit:
+            regressions.append((key, base['median_ns'], stats['median_ns']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the planners over grid size, density and algorithm.")
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(30, 30), (100, 100), (300, 300)],
+                        help="grid sizes as WxH (or W for square grids)")
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.2, 0.3])
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--generator', choices=list(MAP_GENERATORS), default='uniform',
+                        help="map generator; rooms gives narrow passages between open areas")
+    parser.add_argument('--queries', type=int, default=100, help="queries per batch in the queries scenario")
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--memory', action='store_true', help="add an untimed tracemalloc pass per case")
+    parser.add_argument('--obstacles-per-step', type=int, default=OBSTACLES_PER_STEP)
+    parser.add_argument('--seed', type=int, default=BASE_SEED)
+    parser.add_argument('--save-baseline', metavar='PATH', help="write the results as a new baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a stored baseline")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="allowed slowdown before a regression")
+    args = parser.parse_args(argv)
+
+    results = run_sweep(args)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} cases to {args.save_baseline}")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}")
+            return 1
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before / 1e6:.3f}ms -> {after / 1e6:.3f}ms ({after / before - 1:+.0%})")
+        print(f"{len(regressions)} regressions in {len(results)} cases")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,4 +2,9 @@
 GRID_SIZE = (30, 30)
 NUM_OBSTACLES = 50
 NUM_RUNS = 10
-OBSTACLE_DENSITY = 0.2
\ No newline at end of file
+OBSTACLE_DENSITY = 0.2
+# Dynamic steps per run and obstacles added at each step
+NUM_STEPS = 6
+OBSTACLES_PER_STEP = 5
+# Root of every derived map seed in runner.py
+BASE_SEED = 42
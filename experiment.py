@@ -1,20 +1,30 @@
 # experiment.py
+import os
 import random
-import matplotlib.pyplot as plt
 from grid_env import GridEnvironment
 from config import GRID_SIZE, NUM_RUNS
 from utils.metrics import measure_performance
 from algorithms.astar import astar
-from algorithms.dstar_lite import dstar_lite
-from algorithms.theta_star import theta_star
+from algorithms.dstar_lite import dstar_lite, DStarLite
+from algorithms.theta_star import theta_star, lazy_theta_star
+from algorithms.jps import jps
+from utils.results_store import ResultsStore
 
 
 random.seed(42)
 
+SUMMARY_FIELDS = ['environment', 'algorithm', 'avg_time', 'avg_memory', 'avg_path_length']
+
 ALGORITHMS = {
     'A*': astar,
     'D*-Lite': dstar_lite,
-    'Theta*': theta_star
+    'Theta*': theta_star,
+    'Lazy Theta*': lazy_theta_star,
+    'JPS': jps
+}
+
+INCREMENTAL_PLANNERS = {
+    'D*-Lite': DStarLite
 }
 
 def run_experiment():
@@ -29,17 +39,29 @@ def run_experiment():
             env = GridEnvironment(*GRID_SIZE, obstacle_ratio=0.2)
             start, goal = (0, 0), (GRID_SIZE[0]-1, GRID_SIZE[1]-1)
             measured_algo = measure_performance(algo)
+            planner = None
+            if name in INCREMENTAL_PLANNERS:
+                planner = INCREMENTAL_PLANNERS[name](env.grid, start, goal)
+                # Fed the same change sets, for the traced memory pass the repair cannot repeat
+                twin = INCREMENTAL_PLANNERS[name](env.grid, start, goal)
+                measured_algo = measure_performance(planner.replan, twin.replan)
 
             # Static environment
-            path, exec_time, mem_kb = measured_algo(env.grid, start, goal)
+            if planner:
+                path, exec_time, mem_kb = measured_algo()
+            else:
+                path, exec_time, mem_kb = measured_algo(env.grid, start, goal)
             if path:
                 s_time += exec_time
                 s_mem += mem_kb
                 s_len += len(path)
 
             # Dynamic environment
-            env.add_dynamic_obstacles(30)
-            path2, exec_time2, mem_kb2 = measured_algo(env.grid, start, goal)
+            changed = env.add_dynamic_obstacles(30)
+            if planner:
+                path2, exec_time2, mem_kb2 = measured_algo(changed)
+            else:
+                path2, exec_time2, mem_kb2 = measured_algo(env.grid, start, goal)
             if path2:
                 d_time += exec_time2
                 d_mem += mem_kb2
@@ -66,27 +88,12 @@ def run_experiment():
     for algo, res in dynamic_results.items():
         print(f"{algo}: Time={res['avg_time']:.4f}s, Memory={res['avg_memory']:.2f}KB, Path Length={res['avg_path_length']:.2f}")
 
-    # Visualization
-    labels = list(ALGORITHMS.keys())
-    x = range(len(labels))
-
-    def plot_metric(static, dynamic, metric, ylabel):
-        s_vals = [static[k][metric] for k in labels]
-        d_vals = [dynamic[k][metric] for k in labels]
-
-        plt.figure()
-        plt.bar([i - 0.2 for i in x], s_vals, width=0.4, label='Static')
-        plt.bar([i + 0.2 for i in x], d_vals, width=0.4, label='Dynamic')
-        plt.xticks(x, labels)
-        plt.ylabel(ylabel)
-        plt.title(f'{metric.replace("_", " ").title()} Comparison')
-        plt.legend()
-        plt.tight_layout()
-        plt.show()
-
-    plot_metric(static_results, dynamic_results, 'avg_time', 'Time (s)')
-    plot_metric(static_results, dynamic_results, 'avg_memory', 'Memory (KB)')
-    plot_metric(static_results, dynamic_results, 'avg_path_length', 'Path Length')
+    # Stored for report.py, which renders the comparison figures without blocking on a window
+    summary_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'experiment_summary.csv')
+    with ResultsStore(summary_path, SUMMARY_FIELDS, ('environment', 'algorithm'), fresh=True) as store:
+        for environment, results in (('static', static_results), ('dynamic', dynamic_results)):
+            store.append([{'environment': environment, 'algorithm': algo, **res} for algo, res in results.items()])
+    print(f"\nAverages saved to {os.path.basename(summary_path)}; run `python report.py` to plot them.")
 
 if __name__ == '__main__':
     run_experiment()
@@ -0,0 +1,74 @@
+# fleet.py
+import argparse
+import numpy as np
+from config import OBSTACLE_DENSITY, BASE_SEED
+from runner import build_environment, map_seed, parse_size
+from algorithms.multi_agent import FleetPlanner, find_conflicts
+from utils.metrics import time_call
+
+
+def fleet_endpoints(env, anchor, count, seed):
+    # count (start, goal) pairs of distinct free cells, all in the anchor's component
+    rng = np.random.default_rng(seed)
+    cells = []
+    for i in rng.permutation(env.free_cells()):
+        cell = (int(i % env.width), int(i // env.width))
+        if env.connectivity.connected(cell, anchor):
+            cells.append(cell)
+            if len(cells) == 2 * count:
+                break
+    if len(cells) < 2 * count:
+        return None
+    return list(zip(cells[:count], cells[count:]))
+
+
+def run_case(args, size, count):
+    width, height = size
+    env, anchor, _ = build_environment(args.seed, width, height, args.density, 0)
+    if env is None:
+        return None
+    pairs = fleet_endpoints(env, anchor, count, map_seed(args.seed, width, height, args.density, count, 0))
+    if pairs is None:
+        return None
+    planner = FleetPlanner(env.grid)
+    env.subscribe(planner.apply_changes)
+    stats = {}
+    # Cold: every goal's distance field is built; warm: the same fleet again on cached fields
+    paths, cold_ns = time_call(lambda: planner.plan(pairs, stats=stats))
+    _, warm_ns = time_call(lambda: planner.plan(pairs))
+    return {
+        'cold_s': cold_ns / 1e9,
+        'warm_s': warm_ns / 1e9,
+        'per_agent_ms': warm_ns / 1e6 / count,
+        'failed': stats['failed'],
+        'makespan': stats['makespan'],
+        'cost': sum(len(path) - 1 for path in paths if path),
+        'expanded': stats['expanded'],
+        'conflicts': len(find_conflicts(paths, [start for start, _ in pairs]))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time prioritised multi-agent planning against fleet size.")
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(64, 64), (256, 256)],
+                        help="grid sizes as WxH (or W for square grids)")
+    parser.add_argument('--fleet', type=int, nargs='+', default=[10, 50, 100, 200, 400])
+    parser.add_argument('--density', type=float, default=OBSTACLE_DENSITY)
+    parser.add_argument('--seed', type=int, default=BASE_SEED)
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        for count in args.fleet:
+            result = run_case(args, size, count)
+            label = f"{size[0]}x{size[1]} {count:>5} agents"
+            if result is None:
+                print(f"{label}: not enough connected free cells, skipped")
+                continue
+            print(f"{label}  cold {result['cold_s']:8.3f}s  warm {result['warm_s']:8.3f}s  "
+                  f"{result['per_agent_ms']:7.3f}ms/agent  failed {result['failed']:>3}  "
+                  f"makespan {result['makespan']:>5}  cost {result['cost']:>7}  "
+                  f"expanded {result['expanded']:>8}  conflicts {result['conflicts']}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
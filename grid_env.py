@@ -1,27 +1,390 @@
 # grid_env.py
 import random
+import numpy as np
+
+
+class CompactGrid:
+    # Row-major bytearray (0 = free, 1 = obstacle) with a one-cell blocked border,
+    # so planners can step to any neighbour index without bounds checks.
+    def __init__(self, width, height, cells=None):
+        self.width = width
+        self.height = height
+        self.stride = width + 2
+        if cells is None:
+            cells = bytearray(b'\x01') * (self.stride * (height + 2))
+            for y in range(height):
+                i = self.index(0, y)
+                cells[i:i + width] = bytes(width)
+        self.cells = cells
+        self.view = memoryview(cells)
+        self.neighbor_offsets = (-1, 1, -self.stride, self.stride)
+        # Bumped on every mutation made through set_cells/assign so caches can tell the grid changed
+        self.version = 0
+        # Set by GridEnvironment so planners can reject start/goal pairs in different components
+        self.connectivity = None
+        # Structures planners derive from this grid (line of sight, jump tables, hierarchies),
+        # kept on the grid itself so they are freed with it; copies start without them
+        self.caches = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        grid = cls(len(rows[0]), len(rows))
+        for y, row in enumerate(rows):
+            i = grid.index(0, y)
+            grid.cells[i:i + grid.width] = bytes(1 if cell else 0 for cell in row)
+        return grid
+
+    def index(self, x, y):
+        return (y + 1) * self.stride + x + 1
+
+    def coords(self, i):
+        y, x = divmod(i, self.stride)
+        return (x - 1, y - 1)
+
+    def is_free(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.cells[self.index(x, y)] == 0
+
+    def array(self):
+        # Zero-copy (height + 2, stride) uint8 view of the padded buffer
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.height + 2, self.stride)
+
+    def interior(self):
+        return self.array()[1:-1, 1:-1]
+
+    def set_cells(self, cells, value):
+        cells_buf = self.cells
+        changed = []
+        for x, y in cells:
+            i = self.index(x, y)
+            if cells_buf[i] != value:
+                cells_buf[i] = value
+                changed.append((x, y))
+        if changed:
+            self.version += 1
+        return changed
+
+    def assign(self, mask):
+        # Overwrite the interior from a (height, width) boolean/0-1 array, returning the flipped cells
+        interior = self.interior()
+        mask = np.asarray(mask, dtype=np.uint8)
+        ys, xs = np.nonzero(interior != mask)
+        interior[...] = mask
+        if len(xs):
+            self.version += 1
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def copy(self):
+        return CompactGrid(self.width, self.height, bytearray(self.cells))
+
+    def tolist(self):
+        return [list(row) for row in self]
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError('grid row out of range')
+        i = self.index(0, y)
+        # Read-only: writes must go through set_cells/assign so the version, and every
+        # cache keyed on it, sees them
+        return self.view[i:i + self.width].toreadonly()
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self[y]
+
+
+def as_compact(grid):
+    if isinstance(grid, CompactGrid):
+        return grid
+    return CompactGrid.from_rows(grid)
+
+
+def disconnected(grid, start, goal):
+    return grid.connectivity is not None and grid.connectivity.disconnected(start, goal)
+
+
+def component_labels(cells, offsets):
+    # Vectorised union-find over the sorted cell indices `cells`: hook the larger
+    # root of every edge under the smaller, then pointer-jump until all labels are roots.
+    # Returns, for each cell, the index of one cell in its component.
+    parent = np.arange(len(cells))
+    heads, tails = [], []
+    for offset in offsets:
+        neighbors = cells + offset
+        found = np.minimum(np.searchsorted(cells, neighbors), len(cells) - 1)
+        linked = cells[found] == neighbors
+        heads.append(np.flatnonzero(linked))
+        tails.append(found[linked])
+    heads, tails = np.concatenate(heads), np.concatenate(tails)
+    while heads.size:
+        a, b = parent[heads], parent[tails]
+        split = a != b
+        heads, tails, a, b = heads[split], tails[split], a[split], b[split]
+        if not heads.size:
+            break
+        np.minimum.at(parent, np.maximum(a, b), np.minimum(a, b))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    return cells[parent]
+
+
+class ConnectivityIndex:
+    # Connected-component label per cell (-1 for obstacles). Blocking cells only
+    # relabels the components they may have split; freeing a cell merges its neighbours.
+    def __init__(self, grid, local_budget=4096):
+        self.grid = grid
+        self.local_budget = local_budget
+        self.rebuild()
+
+    def rebuild(self):
+        free = np.frombuffer(self.grid.cells, dtype=np.uint8) == 0
+        cells = np.flatnonzero(free)
+        self.labels = np.full(len(free), -1, dtype=np.int64)
+        self.labels[cells] = component_labels(cells, self.grid.neighbor_offsets[1::2])
+        # Labels handed out after a rebuild come from past the last cell index, so they never collide
+        self.next_label = len(free)
+        self.version = self.grid.version
+
+    def refresh(self):
+        if self.version != self.grid.version:
+            self.rebuild()
+
+    def connected(self, a, b):
+        self.refresh()
+        la = self.labels[self.grid.index(*a)]
+        return la >= 0 and la == self.labels[self.grid.index(*b)]
+
+    def disconnected(self, a, b):
+        # Only a definite "no": a blocked start is left to the planner to decide
+        self.refresh()
+        la, lb = self.labels[self.grid.index(*a)], self.labels[self.grid.index(*b)]
+        return lb < 0 or (la >= 0 and la != lb)
+
+    def explore(self, start, targets=()):
+        # Bounded BFS from start. Returns (seen, closed): closed means the whole region fit
+        # in the budget. Stops early, with closed False, once every target has been seen.
+        cells, offsets = self.grid.cells, self.grid.neighbor_offsets
+        seen = {start}
+        remaining = set(targets) - seen
+        frontier = [start]
+        while frontier:
+            if len(seen) >= self.local_budget or (targets and not remaining):
+                return seen, False
+            next_frontier = []
+            for u in frontier:
+                for offset in offsets:
+                    v = u + offset
+                    if not cells[v] and v not in seen:
+                        seen.add(v)
+                        remaining.discard(v)
+                        next_frontier.append(v)
+            frontier = next_frontier
+        return seen, not remaining
+
+    def split(self, runs):
+        # runs: free neighbours of each run of new obstacles inside one component.
+        # Runs whose neighbours still meet locally cannot have disconnected anything.
+        # Otherwise pockets small enough to explore get fresh labels straight away, and the
+        # rest keeps the old label as long as there is provably one large region left.
+        # Returns False when that cannot be shown and the component must be relabelled.
+        labels = self.labels
+        splitting = []
+        for sides in runs:
+            seen, _ = self.explore(sides[0], sides[1:])
+            if any(side not in seen for side in sides):
+                splitting.append(sides)
+        owner = {side: n for n, sides in enumerate(splitting) for side in sides}
+        any_large = shared_pocket = False
+        for n, sides in enumerate(splitting):
+            covered, large = set(), 0
+            for side in sides:
+                if side in covered:
+                    continue
+                seen, closed = self.explore(side)
+                covered.update(s for s in sides if s in seen)
+                if closed:
+                    labels[list(seen)] = self.next_label
+                    self.next_label += 1
+                    shared_pocket = shared_pocket or any(owner.get(c, n) != n for c in seen)
+                else:
+                    large += 1
+            if large > 1:
+                return False
+            any_large = any_large or large == 1
+        return not (shared_pocket and any_large)
+
+    def relabel(self, label):
+        labels = self.labels
+        cells = np.flatnonzero(labels == label)
+        if cells.size:
+            roots = component_labels(cells, self.grid.neighbor_offsets[1::2])
+            _, fresh = np.unique(roots, return_inverse=True)
+            labels[cells] = self.next_label + fresh
+            self.next_label += int(fresh.max()) + 1
+
+    def apply_changes(self, changed):
+        if self.version != self.grid.version - 1:
+            return
+        grid, labels, offsets = self.grid, self.labels, self.grid.neighbor_offsets
+        free = np.frombuffer(grid.cells, dtype=np.uint8) == 0
+        changed = np.array([grid.index(x, y) for x, y in changed])
+        blocked, freed = changed[~free[changed]], changed[free[changed]]
+
+        previous = dict(zip(blocked.tolist(), labels[blocked].tolist()))
+        labels[blocked] = -1
+        # Runs of adjacent new obstacles are checked together: a path through a run
+        # survives as long as the free cells around the run still reach each other.
+        runs = {}
+        pending = set(previous)
+        while pending:
+            run, stack = [], [pending.pop()]
+            while stack:
+                cell = stack.pop()
+                run.append(cell)
+                for offset in offsets:
+                    if cell + offset in pending:
+                        pending.discard(cell + offset)
+                        stack.append(cell + offset)
+            label = previous[run[0]]
+            sides = list({cell + offset for cell in run for offset in offsets if free[cell + offset]})
+            if label >= 0 and len(sides) > 1:
+                runs.setdefault(label, []).append(sides)
+        for label, label_runs in runs.items():
+            if not self.split(label_runs):
+                self.relabel(label)
+
+        for cell in freed.tolist():
+            neighbors = labels[[cell + offset for offset in offsets]]
+            merged = np.unique(neighbors[neighbors >= 0])
+            if merged.size == 0:
+                labels[cell] = self.next_label
+                self.next_label += 1
+                continue
+            target = merged[0]
+            if merged.size > 1:
+                labels[np.isin(labels, merged[1:])] = target
+            labels[cell] = target
+        self.version = grid.version
+
+
+def uniform_obstacles(rng, width, height, density):
+    return rng.random((height, width)) < density
+
+
+def _box_blur(field, radius):
+    padded = np.pad(field, radius, mode='wrap')
+    summed = np.cumsum(np.cumsum(padded, axis=0), axis=1)
+    summed = np.pad(summed, ((1, 0), (1, 0)))
+    k = 2 * radius + 1
+    height, width = field.shape
+    return (summed[k:k + height, k:k + width] - summed[:height, k:k + width]
+            - summed[k:k + height, :width] + summed[:height, :width])
+
+
+def clustered_obstacles(rng, width, height, density, radius=2, passes=2):
+    # Smoothed noise thresholded at the density quantile gives blob-shaped clutter
+    if density <= 0:
+        return np.zeros((height, width), dtype=bool)
+    field = rng.random((height, width))
+    for _ in range(passes):
+        field = _box_blur(field, radius)
+    return field >= np.quantile(field, 1 - density)
+
+
+def room_obstacles(rng, width, height, density, room_size=8):
+    # Walls on a room lattice with one door per wall segment, plus uniform clutter inside rooms
+    mask = rng.random((height, width)) < density
+    ys, xs = np.arange(height), np.arange(width)
+    h_walls = ys[(ys % room_size == room_size - 1) & (ys < height - 1)]
+    v_walls = xs[(xs % room_size == room_size - 1) & (xs < width - 1)]
+    mask[h_walls, :] = True
+    mask[:, v_walls] = True
+
+    # One door per room side, placed at a random offset within the wall segment
+    seg_starts = np.arange(0, width, room_size)
+    seg_lens = np.minimum(room_size - 1, width - seg_starts)
+    for y in h_walls:
+        doors = seg_starts + (rng.random(len(seg_starts)) * seg_lens).astype(int)
+        mask[y, doors] = False
+        mask[y - 1, doors] = False
+        if y + 1 < height:
+            mask[y + 1, doors] = False
+    seg_starts = np.arange(0, height, room_size)
+    seg_lens = np.minimum(room_size - 1, height - seg_starts)
+    for x in v_walls:
+        doors = seg_starts + (rng.random(len(seg_starts)) * seg_lens).astype(int)
+        mask[doors, x] = False
+        mask[doors, x - 1] = False
+        if x + 1 < width:
+            mask[doors, x + 1] = False
+    return mask
+
+
+MAP_GENERATORS = {
+    'uniform': uniform_obstacles,
+    'clustered': clustered_obstacles,
+    'rooms': room_obstacles
+}
+
+
 class GridEnvironment:
-    def __init__(self, width, height, obstacle_ratio=0.2):
+    def __init__(self, width, height, obstacle_ratio=0.2, seed=None, generator='uniform'):
         self.width = width
         self.height = height
         self.obstacle_ratio = obstacle_ratio
-        self.grid = [[0 for _ in range(width)] for _ in range(height)]
+        self.generator = generator
+        # Without an explicit seed, draw one from the global random state so random.seed() still pins maps
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+        self.grid = CompactGrid(width, height)
+        self.listeners = []
         self.generate_obstacles()
+        self.connectivity = self.grid.connectivity = ConnectivityIndex(self.grid)
+        self.subscribe(self.connectivity.apply_changes)
+
+    @property
+    def version(self):
+        return self.grid.version
+
+    def subscribe(self, listener):
+        # listener(changed_cells) is called after every mutation that flipped at least one cell
+        self.listeners.append(listener)
+
+    def notify_listeners(self, changed):
+        if changed:
+            for listener in self.listeners:
+                listener(changed)
+        return changed
 
     def generate_obstacles(self):
-        for y in range(self.height):
-            for x in range(self.width):
-                if random.random() < self.obstacle_ratio:
-                    self.grid[y][x] = 1
+        mask = MAP_GENERATORS[self.generator](self.rng, self.width, self.height, self.obstacle_ratio)
+        return self.notify_listeners(self.grid.assign(mask))
 
     def is_free(self, x, y):
-        return 0 <= x < self.width and 0 <= y < self.height and self.grid[y][x] == 0
+        return self.grid.is_free(x, y)
+
+    def free_cells(self):
+        return np.flatnonzero(self.grid.interior() == 0)
+
+    def clear_cells(self, cells):
+        return self.notify_listeners(self.grid.set_cells(cells, 0))
+
+    def add_obstacles(self, cells):
+        return self.notify_listeners(self.grid.set_cells(cells, 1))
 
     def add_dynamic_obstacles(self, count):
-        added = 0
-        while added < count:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            if self.grid[y][x] == 0:
-                self.grid[y][x] = 1
-                added += 1
+        # Sample directly from the free cells, so this is bounded even when the map is nearly full
+        free = self.free_cells()
+        count = min(count, len(free))
+        if count == 0:
+            return []
+        picks = self.rng.choice(free, size=count, replace=False)
+        ys, xs = np.divmod(picks, self.width)
+        return self.add_obstacles(zip(xs.tolist(), ys.tolist()))
@@ -0,0 +1,103 @@
+# loadgen.py
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from runner import ALGORITHMS
+from service import STREAM_LIMIT
+from utils.metrics import summarize
+
+
+class Client:
+    # One connection with one request in flight at a time (a closed loop), like a controller
+    # waiting on its path before asking again
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count()
+
+    @classmethod
+    async def connect(cls, args):
+        if args.unix:
+            reader, writer = await asyncio.open_unix_connection(args.unix, limit=STREAM_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(args.host, args.port, limit=STREAM_LIMIT)
+        return cls(reader, writer)
+
+    async def call(self, **request):
+        request['id'] = next(self.ids)
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run_level(args, concurrency, starts, goals):
+    # Every client draws (start, goal) pairs until the level's request count is used up;
+    # few distinct goals means more requests the service can batch per goal
+    remaining = itertools.count(args.requests, -1)
+    latencies, batches = [], []
+
+    async def client_loop(client, rng):
+        while next(remaining) > 0:
+            start, goal = rng.choice(starts), rng.choice(goals)
+            sent = time.perf_counter_ns()
+            response = await client.call(op='plan', map=args.map, algorithm=args.algorithm, start=start, goal=goal)
+            latencies.append(time.perf_counter_ns() - sent)
+            batches.append(response['batch'])
+
+    clients = await asyncio.gather(*(Client.connect(args) for _ in range(concurrency)))
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(client, random.Random(args.seed * 1000 + i))
+                           for i, client in enumerate(clients)))
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*(client.close() for client in clients))
+    stats = summarize(latencies)
+    stats['throughput'] = len(latencies) / elapsed
+    stats['mean_batch'] = sum(batches) / len(batches)
+    return stats
+
+
+async def run(args):
+    control = await Client.connect(args)
+    maps = (await control.call(op='maps'))['maps']
+    if args.map not in maps:
+        raise SystemExit(f"unknown map {args.map!r}, the service has {', '.join(maps)}")
+    cells = (await control.call(op='sample', map=args.map, count=args.starts + args.goals))['cells']
+    starts, goals = cells[:args.starts], cells[args.starts:]
+    print(f"{args.map} {maps[args.map]['width']}x{maps[args.map]['height']}, {args.algorithm}, "
+          f"{args.requests} requests per level, {len(goals)} goals")
+    for concurrency in args.concurrency:
+        stats = await run_level(args, concurrency, starts, goals)
+        print(f"concurrency {concurrency:4d}  {stats['throughput']:9.1f} req/s  "
+              f"p50 {stats['median_ns'] / 1e6:8.3f}ms  p99 {stats['p99_ns'] / 1e6:8.3f}ms  "
+              f"mean batch {stats['mean_batch']:5.2f}", flush=True)
+    print(await control.call(op='stats'))
+    await control.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive the planning service and report throughput and latency.")
+    parser.add_argument('--map', required=True, help="name of a map the service preloaded")
+    parser.add_argument('--algorithm', choices=list(ALGORITHMS), default='A*')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--requests', type=int, default=500, help="requests per concurrency level")
+    parser.add_argument('--starts', type=int, default=200, help="distinct start cells")
+    parser.add_argument('--goals', type=int, default=8, help="distinct goal cells")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="connect over a Unix socket instead of TCP")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == '__main__':
+    main()
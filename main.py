@@ -1,32 +1,133 @@
 # GUI-enhanced simulation with step-by-step traversal and autonomous animation
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk
-from grid_env import GridEnvironment
-from utils.metrics import measure_performance
-from algorithms import astar, dstar_lite, theta_star
+from grid_env import ConnectivityIndex, GridEnvironment
+from algorithms import astar, dstar_lite, theta_star, jps, ara_star
+from algorithms.path_cache import PathCache
 import time
 
 
-CELL_SIZE = 20
 GRID_SIZE = 30
+# Cells shrink on large grids so the canvas stays on screen
+CELL_SIZE = max(1, min(20, 800 // GRID_SIZE))
+FREE_COLOR = '#ffffff'
+OBSTACLE_COLOR = '#000000'
+FRONTIER_COLOR = '#cfe3ff'
+# How often the Tk loop collects progress from a planning thread
+POLL_MS = 30
+# Planned paths kept per map; new obstacles only evict the paths they block
+PATH_CACHE_SIZE = 64
 ALGO_MAP = {
     'A*': astar.astar,
     'D*-Lite': dstar_lite.dstar_lite,
-    'Theta*': theta_star.theta_star
+    'Theta*': theta_star.theta_star,
+    'Lazy Theta*': theta_star.lazy_theta_star,
+    'JPS': jps.jps,
+    'ARA*': ara_star.ara_star,
+    'Bidirectional A*': astar.bidirectional_astar
 }
+INCREMENTAL_PLANNERS = {
+    'D*-Lite': dstar_lite.DStarLite
+}
+
+def snapshot(grid):
+    # Private copy with its own connectivity index: planning threads only ever see one of
+    # these, so obstacle clicks and dynamic steps cannot change a map mid-search
+    copy = grid.copy()
+    copy.connectivity = ConnectivityIndex(copy)
+    return copy
+
+
+def sync_snapshot(copy, grid, cells):
+    # Bring a snapshot's cells up to date with the live grid, one value at a time so its
+    # connectivity index can follow each change set incrementally
+    for value in (1, 0):
+        changed = copy.set_cells([(x, y) for x, y in cells if grid[y][x] == value], value)
+        if changed:
+            copy.connectivity.apply_changes(changed)
+
+
+class PlanningCancelled(Exception):
+    pass
+
+
+class PlanningJob:
+    # Runs work(on_expand) on a daemon thread. Expanded cells and the outcome come back
+    # through a queue the Tk loop polls; cancel() makes the next expansion raise.
+    def __init__(self, work):
+        self.cancelled = threading.Event()
+        self.messages = queue.SimpleQueue()
+        self.expanded = 0
+        self.thread = threading.Thread(target=self.run, args=(work,), daemon=True)
+        self.thread.start()
+
+    def on_expand(self, cell):
+        if self.cancelled.is_set():
+            raise PlanningCancelled()
+        self.messages.put(('expand', cell))
+
+    def run(self, work):
+        start_time = time.perf_counter()
+        try:
+            path = work(self.on_expand)
+        except PlanningCancelled:
+            self.messages.put(('cancelled', None, time.perf_counter() - start_time))
+        except Exception as exc:
+            self.messages.put(('error', exc, time.perf_counter() - start_time))
+        else:
+            self.messages.put(('done', path, time.perf_counter() - start_time))
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def drain(self):
+        # Newly expanded cells since the last call, plus the outcome once the thread finished
+        cells, outcome = [], None
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'expand':
+                cells.append(message[1])
+            else:
+                outcome = message
+        self.expanded += len(cells)
+        return cells, outcome
+
 
 class PathPlannerGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Path Planning Simulator")
         self.env = GridEnvironment(GRID_SIZE, GRID_SIZE, obstacle_ratio=0.2)
+        self.path_cache = PathCache(self.env.grid, PATH_CACHE_SIZE)
         self.start = (0, 0)
         self.goal = (GRID_SIZE - 1, GRID_SIZE - 1)
         self.algo_choice = tk.StringVar(value='A*')
         self.path = []
+        self.planner = None
+        self.job = None
+        # Obstacles added while a job runs, handed to the next replan
+        self.pending_changes = []
+        self.replan_wanted = False
+        self.animating = False
+        self.status = tk.StringVar(value="Idle")
 
-        self.canvas = tk.Canvas(self.root, width=GRID_SIZE*CELL_SIZE, height=GRID_SIZE*CELL_SIZE)
+        self.canvas = tk.Canvas(self.root, width=GRID_SIZE*CELL_SIZE, height=GRID_SIZE*CELL_SIZE, highlightthickness=0)
         self.canvas.pack()
+        # The map is one image recoloured cell by cell from change sets; start, goal, path
+        # and agent are single items moved with coords(), so nothing is recreated per redraw
+        self.image = tk.PhotoImage(width=GRID_SIZE*CELL_SIZE, height=GRID_SIZE*CELL_SIZE)
+        self.canvas.create_image(0, 0, image=self.image, anchor='nw')
+        self.frontier = set()
+        self.path_item = self.canvas.create_line(0, 0, 0, 0, fill='green', width=max(1, CELL_SIZE // 4),
+                                                 capstyle='round', joinstyle='round', state='hidden')
+        self.start_item = self.canvas.create_rectangle(0, 0, 0, 0, fill='blue', outline='')
+        self.goal_item = self.canvas.create_rectangle(0, 0, 0, 0, fill='red', outline='')
+        self.agent = self.canvas.create_oval(0, 0, 0, 0, fill='orange', state='hidden')
 
         control_frame = ttk.Frame(self.root)
         control_frame.pack(fill='x')
@@ -36,72 +137,211 @@ class PathPlannerGUI:
         ttk.Button(control_frame, text="Step", command=self.step_through_path).pack(side='left')
         ttk.Button(control_frame, text="Reset", command=self.reset).pack(side='left')
         ttk.Button(control_frame, text="Add Obstacles", command=self.add_obstacles).pack(side='left')
+        ttk.Button(control_frame, text="Cancel", command=self.cancel_planning).pack(side='left')
+        ttk.Label(control_frame, textvariable=self.status).pack(side='left', padx=8)
 
-        self.agent = None
         self.step_index = 0
+        self.env.subscribe(self.draw_cells)
+        self.env.subscribe(self.path_cache.apply_changes)
         self.draw_grid()
 
+    def cell_box(self, x, y, inset=0):
+        return (x*CELL_SIZE + inset, y*CELL_SIZE + inset, (x+1)*CELL_SIZE - inset, (y+1)*CELL_SIZE - inset)
+
+    def cell_color(self, x, y):
+        if self.env.grid[y][x]:
+            return OBSTACLE_COLOR
+        return FRONTIER_COLOR if (x, y) in self.frontier else FREE_COLOR
+
     def draw_grid(self):
-        self.canvas.delete("all")
+        # Full repaint, only needed for a new map: one put per grid row, tiled down the row's pixels
         for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
-                color = 'white'
-                if self.env.grid[y][x] == 1:
-                    color = 'black'
-                self.canvas.create_rectangle(x*CELL_SIZE, y*CELL_SIZE, (x+1)*CELL_SIZE, (y+1)*CELL_SIZE, fill=color)
+            row = ' '.join(' '.join([self.cell_color(x, y)] * CELL_SIZE) for x in range(GRID_SIZE))
+            self.image.put('{' + row + '}', to=(0, y*CELL_SIZE, GRID_SIZE*CELL_SIZE, (y+1)*CELL_SIZE))
+        self.draw_endpoints()
 
-        self.canvas.create_rectangle(self.start[0]*CELL_SIZE, self.start[1]*CELL_SIZE,
-                                     (self.start[0]+1)*CELL_SIZE, (self.start[1]+1)*CELL_SIZE, fill='blue')
-        self.canvas.create_rectangle(self.goal[0]*CELL_SIZE, self.goal[1]*CELL_SIZE,
-                                     (self.goal[0]+1)*CELL_SIZE, (self.goal[1]+1)*CELL_SIZE, fill='red')
+    def draw_cells(self, cells):
+        for x, y in cells:
+            self.image.put(self.cell_color(x, y), to=self.cell_box(x, y))
 
-    def run_algorithm(self):
-        algo = ALGO_MAP[self.algo_choice.get()]
-        measured_algo = measure_performance(algo)
-        (path, time_taken, memory_kb) = measured_algo(self.env.grid, self.start, self.goal)
-        
+    def draw_endpoints(self):
+        self.canvas.coords(self.start_item, *self.cell_box(*self.start))
+        self.canvas.coords(self.goal_item, *self.cell_box(*self.goal))
+
+    def draw_frontier(self, cells):
+        cells = [cell for cell in cells if cell not in self.frontier]
+        self.frontier.update(cells)
+        self.draw_cells(cells)
+
+    def clear_frontier(self):
+        cells, self.frontier = self.frontier, set()
+        self.draw_cells(cells)
+
+    def draw_path(self):
+        # The whole path is one polyline through the cell centres
+        if len(self.path) < 2:
+            self.canvas.itemconfigure(self.path_item, state='hidden')
+            return
+        half = CELL_SIZE / 2
+        points = [v*CELL_SIZE + half for cell in self.path for v in cell]
+        self.canvas.coords(self.path_item, *points)
+        self.canvas.itemconfigure(self.path_item, state='normal')
+
+    def move_agent(self, x, y):
+        inset = CELL_SIZE // 5
+        self.canvas.coords(self.agent, *self.cell_box(x, y, inset))
+        self.canvas.itemconfigure(self.agent, state='normal')
+
+    def start_job(self, work, label, cache_key=None):
+        # Only one planning thread at a time; the UI keeps running while it works
+        self.clear_frontier()
+        self.job = PlanningJob(work)
+        self.job_label = label
+        self.job_cache_key = cache_key
+        self.status.set(f"{label}: planning")
+        self.root.after(POLL_MS, self.poll_job, self.job)
+
+    def poll_job(self, job):
+        if job is not self.job:
+            return
+        cells, outcome = job.drain()
+        self.draw_frontier(cells)
+        if outcome is None:
+            self.status.set(f"{self.job_label}: {job.expanded} expanded")
+            self.root.after(POLL_MS, self.poll_job, job)
+            return
+
+        self.job = None
+        kind, value, elapsed = outcome
+        if kind == 'done':
+            if self.job_cache_key is not None:
+                # Dropped by the cache if obstacles arrived while the job ran
+                start, goal, name, version = self.job_cache_key
+                self.path_cache.put(start, goal, name, value, version)
+            self.set_path(value)
+            self.status.set(f"{self.job_label}: {elapsed:.3f}s, {job.expanded} expanded, path {len(value)}")
+            print(f"[{self.job_label}] Time: {elapsed:.4f}s, Expanded: {job.expanded}, Path length: {len(value)}")
+        elif kind == 'cancelled':
+            self.status.set(f"{self.job_label}: cancelled after {job.expanded} expanded")
+        else:
+            self.status.set(f"{self.job_label}: failed ({value})")
+        if self.replan_wanted:
+            self.replan()
+
+    def cancel_planning(self):
+        if self.job is not None:
+            self.job.cancel()
+        self.replan_wanted = False
+
+    def set_path(self, path):
+        # A new path starts at the agent's current cell, so the animation just carries on along it
         self.path = path
         self.step_index = 0
-        self.draw_grid()
+        self.draw_path()
+        if path and not self.animating:
+            self.animating = True
+            self.root.after(500, self.animate_path)
 
-        for (x, y) in self.path:
-            self.canvas.create_oval(x*CELL_SIZE+6, y*CELL_SIZE+6, x*CELL_SIZE+14, y*CELL_SIZE+14, fill='green')
-        
-        print(f"[{self.algo_choice.get()}] Time: {time_taken:.4f}s, Memory: {memory_kb:.2f}KB, Path length: {len(path)}")
-        self.root.after(500, self.animate_path)
+    def run_algorithm(self):
+        name = self.algo_choice.get()
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+        self.planner = None
+        self.pending_changes = []
+        self.replan_wanted = False
+        self.path = []
+        self.draw_path()
+        self.canvas.itemconfigure(self.agent, state='hidden')
+        if name in INCREMENTAL_PLANNERS:
+            # Keep the planner so "Add Obstacles" can repair instead of replanning from scratch.
+            # It owns a snapshot that replan() brings up to date between jobs.
+            planner = self.planner = INCREMENTAL_PLANNERS[name](snapshot(self.env.grid), self.start, self.goal)
+            self.start_job(lambda on_expand: self.run_planner(planner, on_expand, []), name)
+        else:
+            self.one_shot(name)
+
+    def one_shot(self, name):
+        # Planners that start from scratch search a snapshot, so new obstacles cannot shift under them
+        self.clear_frontier()
+        path = self.path_cache.get(self.start, self.goal, name)
+        if path is not None:
+            self.set_path(path)
+            info = self.path_cache.info()
+            self.status.set(f"{name}: cached, path {len(path)} ({info['hits']} hits, {info['misses']} misses)")
+            return
+        algo, grid, start, goal = ALGO_MAP[name], snapshot(self.env.grid), self.start, self.goal
+        self.start_job(lambda on_expand: algo(grid, start, goal, on_expand=on_expand), name,
+                       (start, goal, name, self.env.version))
+
+    @staticmethod
+    def run_planner(planner, on_expand, changes):
+        planner.on_expand = on_expand
+        return planner.replan(changes)
+
+    def replan(self):
+        # Background replan from wherever the agent is now, with every change since the last one
+        self.replan_wanted = False
+        if self.step_index > 0 and self.path:
+            self.start = self.path[min(self.step_index, len(self.path)) - 1]
+            self.draw_endpoints()
+        name = self.algo_choice.get()
+        if self.planner is not None:
+            planner, changes = self.planner, self.pending_changes
+            self.pending_changes = []
+            # No job is running here, so the planner's snapshot is safe to update
+            sync_snapshot(planner.grid, self.env.grid, changes)
+            planner.move_start(self.start)
+            self.start_job(lambda on_expand: self.run_planner(planner, on_expand, changes), name)
+        else:
+            self.pending_changes = []
+            self.one_shot(name)
 
     def animate_path(self):
         if not self.path or self.step_index >= len(self.path):
+            self.animating = False
             return
-        if self.step_index == 0:
-            self.agent = self.canvas.create_oval(self.start[0]*CELL_SIZE+4, self.start[1]*CELL_SIZE+4,
-                                                 self.start[0]*CELL_SIZE+16, self.start[1]*CELL_SIZE+16, fill='orange')
-        x, y = self.path[self.step_index]
-        self.canvas.coords(self.agent, x*CELL_SIZE+4, y*CELL_SIZE+4, x*CELL_SIZE+16, y*CELL_SIZE+16)
+        self.move_agent(*self.path[self.step_index])
         self.step_index += 1
         self.root.after(100, self.animate_path)
 
     def step_through_path(self):
         if not self.path:
             return
-        if self.step_index == 0:
-            self.agent = self.canvas.create_oval(self.start[0]*CELL_SIZE+4, self.start[1]*CELL_SIZE+4,
-                                                 self.start[0]*CELL_SIZE+16, self.start[1]*CELL_SIZE+16, fill='orange')
         if self.step_index < len(self.path):
-            x, y = self.path[self.step_index]
-            self.canvas.coords(self.agent, x*CELL_SIZE+4, y*CELL_SIZE+4, x*CELL_SIZE+16, y*CELL_SIZE+16)
+            self.move_agent(*self.path[self.step_index])
             self.step_index += 1
 
     def reset(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
         self.env = GridEnvironment(GRID_SIZE, GRID_SIZE, obstacle_ratio=0.2)
+        self.path_cache = PathCache(self.env.grid, PATH_CACHE_SIZE)
+        self.env.subscribe(self.draw_cells)
+        self.env.subscribe(self.path_cache.apply_changes)
         self.path = []
         self.step_index = 0
-        self.agent = None
+        self.planner = None
+        self.pending_changes = []
+        self.replan_wanted = False
+        self.start = (0, 0)
+        self.frontier = set()
+        self.status.set("Idle")
+        self.canvas.itemconfigure(self.agent, state='hidden')
+        self.draw_path()
         self.draw_grid()
 
     def add_obstacles(self):
-        self.env.add_dynamic_obstacles(20)
-        self.draw_grid()
+        # The environment's change set repaints the new obstacles through draw_cells
+        self.pending_changes += self.env.add_dynamic_obstacles(20)
+        if not self.path and self.job is None:
+            return
+        if self.job is not None:
+            # Picked up as soon as the running job finishes
+            self.replan_wanted = True
+        else:
+            self.replan()
 
 if __name__ == '__main__':
     root = tk.Tk()
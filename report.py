@@ -0,0 +1,178 @@
+# report.py
+import argparse
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.results_store import read_rows, aggregate
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+METRICS = ['time_sec', 'memory_kb', 'path_length']
+METRIC_LABELS = {'time_sec': 'Time (s)', 'memory_kb': 'Memory (KB)', 'path_length': 'Path Length'}
+SUMMARY_METRICS = {'avg_time': 'Time (s)', 'avg_memory': 'Memory (KB)', 'avg_path_length': 'Path Length'}
+STYLE = {
+    'A*': {'linestyle': '--', 'linewidth': 2.2},
+    'D*-Lite': {'linestyle': '-.', 'linewidth': 2.2},
+    'Theta*': {'linestyle': '-', 'linewidth': 2.2},
+    'Lazy Theta*': {'linestyle': '-', 'linewidth': 1.2},
+    'JPS': {'linestyle': ':', 'linewidth': 2.2}
+}
+# Digests of the data each figure was last rendered from, kept next to the figures
+MANIFEST = '.report_manifest.json'
+
+
+def found_path(row):
+    return float(row['path_length']) > 0
+
+
+def step_figures(path):
+    # One pass over the stored rows: per-run means by (run, algorithm, step), from which the
+    # averages over all runs are weighted back together, so the CSV is read once
+    per_run = aggregate(read_rows(path), ('run', 'algorithm', 'step'), METRICS, where=found_path)
+    runs = sorted({run for run, _, _ in per_run}, key=int)
+    algorithms = list(dict.fromkeys(algo for _, algo, _ in per_run))
+    steps = range(max((int(step) for _, _, step in per_run), default=-1) + 1)
+    totals = defaultdict(lambda: defaultdict(float))
+    for (_, algo, step), means in per_run.items():
+        for metric in METRICS:
+            totals[(algo, step)][metric] += means[metric] * means['count']
+        totals[(algo, step)]['count'] += means['count']
+
+    def series(lookup, metric):
+        return {algo: [lookup(algo, str(step)).get(metric, 0) for step in steps] for algo in algorithms}
+
+    def average(algo, step):
+        sums = totals.get((algo, step))
+        return {metric: sums[metric] / sums['count'] for metric in METRICS} if sums else {}
+
+    figures = []
+    for metric in METRICS:
+        label = METRIC_LABELS[metric]
+        # Runs are stored from 1, the figures keep the 0-based names they always had
+        for run in runs:
+            figures.append(line_figure(f"run{int(run) - 1}_{metric}.png",
+                                       f"Run {int(run) - 1} - {label} vs. Environment Changes", label,
+                                       series(lambda algo, step: per_run.get((run, algo, step), {}), metric)))
+        figures.append(line_figure(f"average_{metric}.png", f"Average {label} over {len(runs)} Runs", label,
+                                   series(average, metric)))
+    return figures
+
+
+def line_figure(filename, title, ylabel, series):
+    return {'kind': 'line', 'file': filename, 'title': title, 'xlabel': "# of Dynamic Obstacle Additions",
+            'ylabel': ylabel, 'series': series, 'style': {algo: STYLE.get(algo, {}) for algo in series}}
+
+
+def summary_figures(path):
+    # Static vs. dynamic bars from the averages experiment.py stores
+    rows = list(read_rows(path))
+    labels = list(dict.fromkeys(row['algorithm'] for row in rows))
+    values = {(row['environment'], row['algorithm']): row for row in rows}
+    figures = []
+    for metric, label in SUMMARY_METRICS.items():
+        figures.append({'kind': 'bar', 'file': f"{metric}_comparison.png",
+                        'title': f'{metric.replace("_", " ").title()} Comparison', 'ylabel': label,
+                        'labels': labels,
+                        'series': {env: [float(values.get((env, algo), {}).get(metric, 0)) for algo in labels]
+                                   for env in ('static', 'dynamic')}})
+    return figures
+
+
+def digest(figure):
+    return hashlib.sha256(json.dumps(figure, sort_keys=True).encode()).hexdigest()
+
+
+def render(figure, out_dir):
+    # Imported here so only the workers pay for matplotlib, and with a backend that never
+    # opens a window
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    if figure['kind'] == 'line':
+        for algo, values in figure['series'].items():
+            ax.plot(range(len(values)), values, marker='o', label=algo, **figure['style'].get(algo, {}))
+        ax.set_xlabel(figure['xlabel'])
+        ax.grid(True)
+    else:
+        x = range(len(figure['labels']))
+        for offset, (env, values) in zip((-0.2, 0.2), figure['series'].items()):
+            ax.bar([i + offset for i in x], values, width=0.4, label=env.title())
+        ax.set_xticks(list(x))
+        ax.set_xticklabels(figure['labels'])
+    ax.set_ylabel(figure['ylabel'])
+    ax.set_title(figure['title'])
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(os.path.join(out_dir, figure['file']))
+    plt.close(fig)
+    return figure['file']
+
+
+def load_manifest(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def render_all(figures, out_dir, workers=None, force=False):
+    # Renders the figures whose data changed or whose file is missing and returns
+    # (rendered, skipped); the manifest only records figures that were actually written
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = load_manifest(manifest_path)
+    todo = []
+    for figure in figures:
+        key = digest(figure)
+        if not force and manifest.get(figure['file']) == key and os.path.exists(os.path.join(out_dir, figure['file'])):
+            continue
+        todo.append((figure, key))
+    keys = {figure['file']: key for figure, key in todo}
+    try:
+        if workers == 1 or len(todo) <= 1:
+            for figure, key in todo:
+                manifest[render(figure, out_dir)] = key
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), len(todo))) as pool:
+                for future in as_completed([pool.submit(render, figure, out_dir) for figure, _ in todo]):
+                    filename = future.result()
+                    manifest[filename] = keys[filename]
+    finally:
+        save_manifest(manifest_path, manifest)
+    return len(todo), len(figures) - len(todo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the figures of stored experiment results.")
+    parser.add_argument('--input', default=os.path.join(current_dir, 'path_planning_experiment.csv'),
+                        help="per-step results from new_expirement.py")
+    parser.add_argument('--summary', default=os.path.join(current_dir, 'experiment_summary.csv'),
+                        help="static/dynamic averages from experiment.py")
+    parser.add_argument('--output-dir', default=current_dir)
+    parser.add_argument('--workers', type=int, default=None, help="render processes (default: all cores, 1 renders inline)")
+    parser.add_argument('--force', action='store_true', help="render every figure, changed or not")
+    args = parser.parse_args(argv)
+
+    figures = []
+    for path, build in ((args.input, step_figures), (args.summary, summary_figures)):
+        if os.path.exists(path):
+            figures += build(path)
+        else:
+            print(f"{path} not found, skipped")
+    os.makedirs(args.output_dir, exist_ok=True)
+    rendered, skipped = render_all(figures, args.output_dir, args.workers, args.force)
+    print(f"Rendered {rendered} figures, {skipped} unchanged, in {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
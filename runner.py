@@ -0,0 +1,187 @@
+# runner.py
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from grid_env import GridEnvironment
+from config import GRID_SIZE, NUM_RUNS, OBSTACLE_DENSITY, NUM_STEPS, OBSTACLES_PER_STEP, BASE_SEED
+from utils.metrics import measure_performance, time_call
+from utils.results_store import ResultsStore
+from algorithms.astar import astar, bidirectional_astar
+from algorithms.dstar_lite import dstar_lite, DStarLite
+from algorithms.theta_star import theta_star, lazy_theta_star
+from algorithms.jps import jps
+from algorithms.hpa_star import hpa_star
+from algorithms.ara_star import ara_star, ARAStar
+from algorithms.stats import COUNTERS
+
+
+ALGORITHMS = {
+    'A*': astar,
+    'D*-Lite': dstar_lite,
+    'Theta*': theta_star,
+    'Lazy Theta*': lazy_theta_star,
+    'JPS': jps,
+    'ARA*': ara_star,
+    'Bidirectional A*': bidirectional_astar,
+    'HPA*': hpa_star
+}
+
+INCREMENTAL_PLANNERS = {
+    'D*-Lite': DStarLite
+}
+
+# Planners that take a time/expansion budget and report a suboptimality bound
+ANYTIME_PLANNERS = {
+    'ARA*': ARAStar
+}
+
+MAX_ATTEMPTS = 100
+KEY_FIELDS = ('width', 'height', 'density', 'run', 'seed', 'step', 'algorithm')
+FIELDS = ['width', 'height', 'density', 'run', 'seed', 'step', 'algorithm', 'time_sec', 'memory_kb', 'path_length', 'bound'] + list(COUNTERS)
+# One row per path an anytime planner published, for quality-vs-time curves
+CURVE_FIELDS = list(KEY_FIELDS) + ['solution', 'elapsed_sec', 'expansions', 'cost', 'bound']
+
+
+def map_seed(base_seed, width, height, density, run, attempt):
+    # Derived from the task's coordinates only, so every worker regenerates the same map
+    key = [base_seed, width, height, int(round(density * 10000)), run, attempt]
+    return int(np.random.SeedSequence(key).generate_state(1, dtype=np.uint64)[0])
+
+
+def build_environment(base_seed, width, height, density, run, generator='uniform'):
+    # First attempt whose start and goal are connected; None if there is none
+    start, goal = (0, 0), (width - 1, height - 1)
+    for attempt in range(MAX_ATTEMPTS):
+        env = GridEnvironment(width, height, obstacle_ratio=density, generator=generator,
+                              seed=map_seed(base_seed, width, height, density, run, attempt))
+        env.clear_cells([start, goal])
+        if env.connectivity.connected(start, goal):
+            return env, start, goal
+    return None, start, goal
+
+
+def run_task(task):
+    # One (map, algorithm) pair over every dynamic step; all randomness comes from the map seed.
+    # Returns the result rows and, for anytime planners, the published solutions per step.
+    width, height, density, run, algo_name, steps, per_step, base_seed, deadline, max_expansions, counters = task
+    env, start, goal = build_environment(base_seed, width, height, density, run)
+    if env is None:
+        return [], []
+    rows, curves = [], []
+    planner = twin = None
+    changed = []
+    for step in range(steps):
+        if step > 0:
+            changed += env.add_dynamic_obstacles(per_step)
+            if not env.connectivity.connected(start, goal):
+                continue
+
+        # Counters are off in timed calls unless asked for, so time_sec stays comparable
+        stats = {} if counters else None
+        bound = ''
+        key = {'width': width, 'height': height, 'density': density, 'run': run + 1,
+               'seed': env.seed, 'step': step, 'algorithm': algo_name}
+        if algo_name in INCREMENTAL_PLANNERS:
+            if planner is None:
+                planner = INCREMENTAL_PLANNERS[algo_name](env.grid, start, goal, stats=stats)
+                # Fed the same change sets, for the traced memory pass the repair cannot repeat
+                twin = INCREMENTAL_PLANNERS[algo_name](env.grid, start, goal)
+            if planner.stats is not None:
+                planner.stats.clear()
+            stats = planner.stats
+            path, exec_time, mem_kb = measure_performance(planner.replan, twin.replan)(changed)
+        elif algo_name in ANYTIME_PLANNERS:
+            # Untraced: tracemalloc would eat most of a time slice, so no memory figure here
+            anytime = ANYTIME_PLANNERS[algo_name](env.grid, start, goal)
+            (path, bound), exec_ns = time_call(anytime.search, deadline, max_expansions, stats)
+            exec_time, mem_kb = exec_ns / 1e9, ''
+            for solution, (elapsed, expansions, cost, solution_bound) in enumerate(anytime.solutions):
+                curves.append({**key, 'solution': solution, 'elapsed_sec': round(elapsed, 6),
+                               'expansions': expansions, 'cost': cost, 'bound': round(solution_bound, 4)})
+            bound = round(bound, 4)
+        else:
+            path, exec_time, mem_kb = measure_performance(ALGORITHMS[algo_name])(env.grid, start, goal)
+            if counters:
+                # Separate untimed pass; incremental and anytime planners count in the timed call,
+                # since running them again would not repeat the same search
+                ALGORITHMS[algo_name](env.grid, start, goal, stats=stats)
+        rows.append({
+            **key,
+            'time_sec': round(exec_time, 5),
+            'memory_kb': round(mem_kb, 2) if mem_kb != '' else '',
+            'path_length': len(path) if path else 0,
+            'bound': bound,
+            **{counter: stats.get(counter, 0) if stats is not None else '' for counter in COUNTERS}
+        })
+        changed = []
+    return rows, curves
+
+
+def make_tasks(sizes, densities, runs, algorithms, steps, per_step, base_seed, deadline=None, max_expansions=None,
+               counters=False):
+    return [(width, height, density, run, algo_name, steps, per_step, base_seed, deadline, max_expansions, counters)
+            for width, height in sizes
+            for density in densities
+            for run in range(runs)
+            for algo_name in algorithms]
+
+
+def run_tasks(tasks, workers=None):
+    # Yields each task's (rows, curves) in task order, as soon as every earlier task has finished,
+    # so the output does not depend on the number of workers
+    if workers == 1:
+        for task in tasks:
+            yield run_task(task)
+        return
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(tasks) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(run_task, tasks, chunksize=chunksize)
+
+
+def parse_size(text):
+    width, _, height = text.lower().partition('x')
+    return int(width), int(height or width)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the dynamic path planning experiment on a process pool.")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores, 1 runs inline)")
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[GRID_SIZE], help="grid sizes as WxH")
+    parser.add_argument('--densities', type=float, nargs='+', default=[OBSTACLE_DENSITY])
+    parser.add_argument('--runs', type=int, default=NUM_RUNS, help="maps per size and density")
+    parser.add_argument('--steps', type=int, default=NUM_STEPS)
+    parser.add_argument('--obstacles-per-step', type=int, default=OBSTACLES_PER_STEP)
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--seed', type=int, default=BASE_SEED)
+    parser.add_argument('--budget-ms', type=float, default=None, help="time slice per plan for anytime planners")
+    parser.add_argument('--budget-expansions', type=int, default=None, help="expansion budget per plan for anytime planners")
+    parser.add_argument('--counters', action='store_true', help="also record search counters (see algorithms/stats.py)")
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(__file__), "path_planning_sweep.csv"))
+    parser.add_argument('--fresh', action='store_true', help="discard existing results instead of resuming")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.output, FIELDS, KEY_FIELDS, fresh=args.fresh)
+    curve_store = ResultsStore(os.path.splitext(args.output)[0] + '_curves.csv', CURVE_FIELDS,
+                               KEY_FIELDS + ('solution',), fresh=args.fresh)
+    # A task's rows are appended together, so any stored row means the task finished
+    finished = {(width, height, density, run, algo_name) for width, height, density, run, _, _, algo_name in store.keys}
+    deadline = args.budget_ms / 1000 if args.budget_ms is not None else None
+    tasks = [task for task in make_tasks(args.sizes, args.densities, args.runs, args.algorithms, args.steps,
+                                         args.obstacles_per_step, args.seed, deadline, args.budget_expansions,
+                                         args.counters)
+             if (str(task[0]), str(task[1]), str(task[2]), str(task[3] + 1), task[4]) not in finished]
+    if len(finished):
+        print(f"Resuming: {len(finished)} tasks already in {args.output}")
+    written = 0
+    with store, curve_store:
+        for done, (rows, curves) in enumerate(run_tasks(tasks, args.workers), 1):
+            curve_store.append(curves)
+            written += store.append(rows)
+            if done % len(args.algorithms) == 0:
+                print(f"[{done}/{len(tasks)}] {written} rows", end='\r', flush=True)
+    print(f"\nWrote {written} rows from {len(tasks)} tasks to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# scenarios.py
+import argparse
+import math
+import os
+import time
+from collections import defaultdict
+from grid_env import ConnectivityIndex
+from runner import ALGORITHMS
+from algorithms.distance_field import wavefront
+from algorithms.theta_star import line_of_sight
+from utils.map_loader import load_map, load_scenarios
+from utils.results_store import ResultsStore
+
+# Planners whose paths are corner points joined by straight segments rather than grid steps
+ANY_ANGLE = {'Theta*', 'Lazy Theta*'}
+FIELDS = ['scen', 'map', 'index', 'bucket', 'algorithm', 'time_sec', 'cost', 'grid_optimal', 'reference', 'status']
+
+
+def resolve_map(map_name, map_dir):
+    for candidate in (os.path.join(map_dir, map_name), os.path.join(map_dir, os.path.basename(map_name))):
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"map {map_name} not found in {map_dir}")
+
+
+def path_cost(path, any_angle):
+    if any_angle:
+        return sum(math.dist(a, b) for a, b in zip(path, path[1:]))
+    return len(path) - 1
+
+
+def valid_path(grid, path, start, goal, any_angle):
+    if path[0] != start or path[-1] != goal or not all(grid.is_free(x, y) for x, y in path):
+        return False
+    if any_angle:
+        return all(line_of_sight(grid, a, b) for a, b in zip(path, path[1:]))
+    return all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
+
+
+def check(grid, scenario, path, cost, grid_optimal, any_angle):
+    # grid_optimal is the exact 4-connected distance (-1 if unreachable). The file's reference
+    # lengths are usually octile, so they only bound 4-connected costs from below.
+    if not path:
+        return 'ok' if grid_optimal < 0 else 'missed'
+    if grid_optimal < 0:
+        return 'unreachable path'
+    if not valid_path(grid, path, scenario.start, scenario.goal, any_angle):
+        return 'invalid'
+    if any_angle:
+        return 'ok' if cost <= grid_optimal + 1e-6 else 'worse than grid'
+    if cost < scenario.optimal - 1e-6:
+        return 'below reference'
+    return 'ok' if cost == grid_optimal else 'suboptimal'
+
+
+def run_map(scen_name, map_path, scenarios, algorithms, store):
+    # scenarios: (index in the .scen file, Scenario) pairs that all use this map
+    grid = load_map(map_path)
+    grid.connectivity = ConnectivityIndex(grid)
+    name = os.path.basename(map_path)
+    grid_optimal = {}
+    for index, scenario in scenarios:
+        if scenario.goal not in grid_optimal:
+            grid_optimal[scenario.goal] = wavefront(grid, grid.index(*scenario.goal))
+        optimal = int(grid_optimal[scenario.goal][grid.index(*scenario.start)])
+        for algo_name in algorithms:
+            if (scen_name, index, algo_name) in store:
+                continue
+            any_angle = algo_name in ANY_ANGLE
+            start_time = time.perf_counter()
+            path = ALGORITHMS[algo_name](grid, scenario.start, scenario.goal)
+            elapsed = time.perf_counter() - start_time
+            cost = path_cost(path, any_angle) if path else 0
+            store.append({
+                'scen': scen_name,
+                'map': name,
+                'index': index,
+                'bucket': scenario.bucket,
+                'algorithm': algo_name,
+                'time_sec': round(elapsed, 6),
+                'cost': round(cost, 4),
+                'grid_optimal': optimal,
+                'reference': scenario.optimal,
+                'status': check(grid, scenario, path, cost, optimal, any_angle)
+            })
+
+
+def summarize(rows):
+    totals = defaultdict(lambda: {'count': 0, 'solved': 0, 'time': 0.0, 'ratio': 0.0, 'status': defaultdict(int)})
+    for row in rows:
+        total = totals[row['algorithm']]
+        total['count'] += 1
+        total['time'] += float(row['time_sec'])
+        total['status'][row['status']] += 1
+        if float(row['cost']) > 0 and float(row['reference']) > 0:
+            total['solved'] += 1
+            total['ratio'] += float(row['cost']) / float(row['reference'])
+    for algo_name, total in totals.items():
+        problems = {status: n for status, n in total['status'].items() if status != 'ok'}
+        ratio = total['ratio'] / total['solved'] if total['solved'] else 0
+        print(f"{algo_name:<12} {total['count']:>7} scenarios  {total['solved']:>7} solved  "
+              f"mean {total['time'] / max(total['count'], 1) * 1000:8.3f}ms  "
+              f"cost/reference {ratio:.4f}  problems {problems or 'none'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run .scen benchmark scenarios through the planners.")
+    parser.add_argument('scenarios', nargs='+', help=".scen files")
+    parser.add_argument('--map-dir', help="directory holding the .map files (default: next to each .scen)")
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--limit', type=int, default=None, help="scenarios per .scen file")
+    parser.add_argument('--output', default='scenario_results.csv')
+    parser.add_argument('--fresh', action='store_true', help="discard existing results instead of resuming")
+    args = parser.parse_args(argv)
+
+    with ResultsStore(args.output, FIELDS, ('scen', 'index', 'algorithm'), fresh=args.fresh) as store:
+        for scen_path in args.scenarios:
+            by_map = defaultdict(list)
+            for index, scenario in enumerate(load_scenarios(scen_path)[:args.limit]):
+                by_map[scenario.map].append((index, scenario))
+            for map_name, scenarios in by_map.items():
+                map_path = resolve_map(map_name, args.map_dir or os.path.dirname(os.path.abspath(scen_path)))
+                print(f"{map_path}: {len(scenarios)} scenarios")
+                run_map(os.path.basename(scen_path), map_path, scenarios, args.algorithms, store)
+        summarize(store.rows())
+
+
+if __name__ == '__main__':
+    main()
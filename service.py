@@ -0,0 +1,429 @@
+# service.py
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import defaultdict, deque
+import numpy as np
+from config import BASE_SEED, OBSTACLE_DENSITY
+from grid_env import CompactGrid, ConnectivityIndex
+from runner import ALGORITHMS, build_environment, parse_size
+from algorithms.distance_field import DistanceFieldCache
+from algorithms.path_cache import PathCache
+from utils.map_loader import load_map
+
+# Planners that return shortest 4-connected paths: requests of theirs that share a goal can
+# all be answered by walking one distance field instead of searching once each
+GRID_OPTIMAL = {'A*', 'JPS', 'Bidirectional A*', 'D*-Lite'}
+# How long the first request for a (map, algorithm) waits for others to join its batch
+BATCH_WINDOW = 0.002
+MAX_BATCH = 64
+# Messages (plan batches and updates) queued in each worker's pipe at once; the rest wait
+# here. This bounds the number of messages, not their size: one large batch or update can
+# still fill the pipe and block the event loop until the worker reads it
+MAX_IN_FLIGHT = 2
+# Longest request or reply line, in bytes; asyncio's default of 64 KiB is too small for
+# update cell lists and long paths on big maps
+STREAM_LIMIT = 16 * 1024 * 1024
+# Fields each op cannot do without
+REQUIRED = {'plan': ('map', 'start', 'goal'), 'update': ('map',), 'sample': ('map',)}
+
+
+class ServiceError(Exception):
+    pass
+
+
+class MapState:
+    # A worker's copy of one map, with the indexes that follow its change sets
+    def __init__(self, grid):
+        self.grid = grid
+        self.connectivity = grid.connectivity = ConnectivityIndex(grid)
+        self.paths = PathCache(grid)
+        self.fields = DistanceFieldCache(grid)
+        self.listeners = [self.connectivity.apply_changes, self.paths.apply_changes, self.fields.apply_changes]
+
+    def update(self, blocked, cleared):
+        for cells, value in ((blocked, 1), (cleared, 0)):
+            changed = self.grid.set_cells(cells, value)
+            if changed:
+                for listener in self.listeners:
+                    listener(changed)
+
+    def plan(self, algo_name, queries):
+        # queries: [(start, goal)]; paths come back in the same order
+        paths = [None] * len(queries)
+        by_goal = defaultdict(list)
+        for i, (start, goal) in enumerate(queries):
+            if self.connectivity.disconnected(start, goal):
+                paths[i] = []
+                continue
+            paths[i] = self.paths.get(start, goal, algo_name)
+            if paths[i] is None:
+                by_goal[goal].append(i)
+        for goal, pending in by_goal.items():
+            # A field costs about one search, so it pays off from the second query on
+            use_field = algo_name in GRID_OPTIMAL and (len(pending) > 1 or goal in self.fields.fields)
+            for i in pending:
+                start = queries[i][0]
+                if use_field:
+                    paths[i] = self.fields.path(start, goal)
+                else:
+                    paths[i] = ALGORITHMS[algo_name](self.grid, start, goal)
+                self.paths.put(start, goal, algo_name, paths[i])
+        return paths
+
+
+def worker(conn, maps):
+    # maps: {name: (width, height, padded cells, version)}. Messages arrive in send order,
+    # so a plan sent after an update always sees it.
+    states = {}
+    for name, (width, height, cells, version) in maps.items():
+        grid = CompactGrid(width, height, bytearray(cells))
+        grid.version = version
+        states[name] = MapState(grid)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message[0] == 'plan':
+            _, batch_id, name, algo_name, queries = message
+            state = states[name]
+            try:
+                paths = state.plan(algo_name, queries)
+            except Exception as exc:
+                conn.send(('error', batch_id, repr(exc)))
+            else:
+                conn.send(('done', batch_id, state.grid.version, paths))
+        elif message[0] == 'update':
+            _, batch_id, name, blocked, cleared = message
+            try:
+                states[name].update(blocked, cleared)
+            except Exception as exc:
+                conn.send(('error', batch_id, repr(exc)))
+            else:
+                conn.send(('done', batch_id, states[name].grid.version))
+        else:
+            break
+
+
+class WorkerHandle:
+    def __init__(self, maps):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=worker, args=(child, maps), daemon=True)
+        self.process.start()
+        child.close()
+        # batch id -> future for the worker's reply
+        self.pending = {}
+        # Change sets not yet sent, in order; they go out before any further plan batch
+        self.outbox = deque()
+
+
+class PlanningService:
+    # Plan requests are grouped per (map, algorithm) for BATCH_WINDOW and handed to the least
+    # loaded worker as one message. Every worker holds its own warm copy of every map;
+    # updates are applied here first, then broadcast to all of them as change sets.
+    def __init__(self, maps, workers, window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.maps = maps
+        self.window = window
+        self.max_batch = max_batch
+        snapshot = {name: (grid.width, grid.height, bytes(grid.cells), grid.version) for name, grid in maps.items()}
+        self.workers = [WorkerHandle(snapshot) for _ in range(workers)]
+        # (map, algorithm) -> (requests, flush timer) still collecting
+        self.collecting = {}
+        self.ready = deque()
+        self.batch_ids = itertools.count()
+        self.counters = defaultdict(int)
+        self.rng = np.random.default_rng()
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        for handle in self.workers:
+            loop.add_reader(handle.conn.fileno(), self.collect, handle)
+
+    def close(self):
+        loop = asyncio.get_running_loop()
+        for handle in self.workers:
+            loop.remove_reader(handle.conn.fileno())
+            try:
+                handle.conn.send(('stop',))
+            except OSError:
+                pass
+            handle.process.join(timeout=1)
+
+    def collect(self, handle):
+        try:
+            while handle.conn.poll():
+                kind, batch_id, *reply = handle.conn.recv()
+                future = handle.pending.pop(batch_id)
+                if kind == 'done':
+                    future.set_result(reply)
+                else:
+                    future.set_exception(ServiceError(reply[0]))
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(handle.conn.fileno())
+            self.workers.remove(handle)
+            for future in handle.pending.values():
+                future.set_exception(ServiceError("worker exited"))
+            handle.pending.clear()
+        self.dispatch()
+
+    async def plan(self, name, algo_name, start, goal):
+        loop = asyncio.get_running_loop()
+        key = (name, algo_name)
+        if key not in self.collecting:
+            self.collecting[key] = ([], loop.call_later(self.window, self.flush, key))
+        requests = self.collecting[key][0]
+        future = loop.create_future()
+        requests.append((start, goal, future))
+        if len(requests) >= self.max_batch:
+            self.flush(key)
+        return await future
+
+    def flush(self, key):
+        requests, timer = self.collecting.pop(key)
+        timer.cancel()
+        for part in self.split(requests):
+            self.ready.append((key, part))
+            self.counters['batches'] += 1
+        self.counters['requests'] += len(requests)
+        self.dispatch()
+
+    def split(self, requests):
+        # One part per worker so a large batch still runs in parallel, keeping requests that
+        # share a goal together (largest goal groups first, each to the smallest part)
+        by_goal = defaultdict(list)
+        for request in requests:
+            by_goal[request[1]].append(request)
+        parts = [[] for _ in range(min(len(by_goal), max(len(self.workers), 1)))]
+        for group in sorted(by_goal.values(), key=len, reverse=True):
+            min(parts, key=len).extend(group)
+        return parts
+
+    def send(self, handle, kind, *payload):
+        # Sends one message to the worker and returns the future its reply resolves
+        batch_id = next(self.batch_ids)
+        reply = handle.pending[batch_id] = asyncio.get_running_loop().create_future()
+        handle.conn.send((kind, batch_id, *payload))
+        return reply
+
+    def dispatch(self):
+        # Updates share the in-flight limit with plans, and a worker with updates still
+        # queued takes no plan batch, so every batch it plans has seen every earlier update
+        for handle in self.workers:
+            while handle.outbox and len(handle.pending) < MAX_IN_FLIGHT:
+                self.send(handle, 'update', *handle.outbox.popleft()).add_done_callback(self.updated)
+        while self.ready:
+            if not self.workers:
+                for _, requests in self.ready:
+                    for *_, future in requests:
+                        future.set_exception(ServiceError("no workers left"))
+                self.ready.clear()
+                return
+            idle = [handle for handle in self.workers if not handle.outbox]
+            handle = min(idle, key=lambda h: len(h.pending), default=None)
+            if handle is None or len(handle.pending) >= MAX_IN_FLIGHT:
+                return
+            (name, algo_name), requests = self.ready.popleft()
+            reply = self.send(handle, 'plan', name, algo_name, [(start, goal) for start, goal, _ in requests])
+            reply.add_done_callback(lambda reply, requests=requests: self.resolve(reply, requests))
+
+    @staticmethod
+    def updated(reply):
+        if reply.exception() is not None:
+            print(f"update failed in a worker: {reply.exception()}", flush=True)
+
+    @staticmethod
+    def resolve(reply, requests):
+        if reply.exception() is not None:
+            for *_, future in requests:
+                if not future.done():
+                    future.set_exception(reply.exception())
+            return
+        version, paths = reply.result()
+        for (_, _, future), path in zip(requests, paths):
+            if not future.done():
+                future.set_result((path, version, len(requests)))
+
+    def update(self, name, blocked, cleared):
+        grid = self.maps[name]
+        blocked = grid.set_cells(blocked, 1)
+        cleared = grid.set_cells(cleared, 0)
+        if blocked or cleared:
+            for handle in self.workers:
+                handle.outbox.append((name, blocked, cleared))
+            self.dispatch()
+        return grid.version, len(blocked) + len(cleared)
+
+    def cell(self, grid, value):
+        if not (isinstance(value, list) and len(value) == 2):
+            raise ServiceError(f"cell {value!r} is not an [x, y] pair")
+        x, y = value
+        if not (isinstance(x, int) and isinstance(y, int) and 0 <= x < grid.width and 0 <= y < grid.height):
+            raise ServiceError(f"cell {value} is outside the {grid.width}x{grid.height} map")
+        return x, y
+
+    def cells(self, grid, request, field):
+        values = request.get(field, [])
+        if not isinstance(values, list):
+            raise ServiceError(f"{field!r} must be a list of [x, y] cells")
+        return [self.cell(grid, value) for value in values]
+
+    def grid(self, request):
+        name = request.get('map')
+        if name not in self.maps:
+            raise ServiceError(f"unknown map {name!r}")
+        return name, self.maps[name]
+
+    async def handle_request(self, request):
+        op = request.get('op')
+        missing = [field for field in REQUIRED.get(op, ()) if field not in request]
+        if missing:
+            raise ServiceError(f"{op} request is missing {', '.join(map(repr, missing))}")
+        if op == 'plan':
+            name, grid = self.grid(request)
+            algo_name = request.get('algorithm', 'A*')
+            if algo_name not in ALGORITHMS:
+                raise ServiceError(f"unknown algorithm {algo_name!r}")
+            start, goal = self.cell(grid, request['start']), self.cell(grid, request['goal'])
+            start_time = time.perf_counter()
+            path, version, batch = await self.plan(name, algo_name, start, goal)
+            return {'path': path, 'version': version, 'batch': batch,
+                    'ms': round((time.perf_counter() - start_time) * 1000, 3)}
+        if op == 'update':
+            name, grid = self.grid(request)
+            blocked, cleared = self.cells(grid, request, 'block'), self.cells(grid, request, 'clear')
+            version, changed = self.update(name, blocked, cleared)
+            return {'version': version, 'changed': changed}
+        if op == 'sample':
+            # Random free cells, for clients that need valid endpoints
+            name, grid = self.grid(request)
+            count = request.get('count', 1)
+            if not isinstance(count, int) or count < 0:
+                raise ServiceError(f"count must be a non-negative integer, not {count!r}")
+            free = np.flatnonzero(grid.interior() == 0)
+            picks = self.rng.choice(free, size=min(count, len(free)), replace=False)
+            return {'cells': [[int(i % grid.width), int(i // grid.width)] for i in picks]}
+        if op == 'maps':
+            return {'maps': {name: {'width': grid.width, 'height': grid.height, 'version': grid.version}
+                             for name, grid in self.maps.items()}}
+        if op == 'stats':
+            batches = self.counters['batches']
+            return {'requests': self.counters['requests'], 'batches': batches, 'workers': len(self.workers),
+                    'mean_batch': round(self.counters['requests'] / batches, 3) if batches else 0}
+        raise ServiceError(f"unknown op {op!r}")
+
+    async def respond(self, line, writer):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ServiceError("request must be a JSON object")
+        except (ValueError, ServiceError) as exc:
+            request, response = {}, {'error': str(exc)}
+        else:
+            try:
+                response = await self.handle_request(request)
+            except (ServiceError, KeyError, TypeError, ValueError) as exc:
+                response = {'error': str(exc)}
+        response['id'] = request.get('id')
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+    async def serve_client(self, reader, writer):
+        # One JSON object per line each way. Requests on a connection run concurrently,
+        # so replies can come back out of order and carry the request's id.
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as exc:
+                    # The connection closed; a last line without a newline still counts
+                    line = exc.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError:
+                    # Too long to parse: skip the rest of the line and answer with an error,
+                    # so the client's other requests on this connection keep going
+                    await skip_line(reader)
+                    writer.write(json.dumps({'error': f"request line longer than {STREAM_LIMIT} bytes",
+                                             'id': None}).encode() + b'\n')
+                    await writer.drain()
+                    continue
+                if line.strip():
+                    task = asyncio.create_task(self.respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+
+async def skip_line(reader):
+    # Discard up to and including the next newline, however far away it is
+    while True:
+        try:
+            await reader.readuntil(b'\n')
+            return
+        except asyncio.LimitOverrunError as exc:
+            await reader.readexactly(exc.consumed)
+        except asyncio.IncompleteReadError:
+            return
+
+
+def load_maps(args):
+    maps = {}
+    for path in args.map:
+        maps[os.path.splitext(os.path.basename(path))[0]] = load_map(path)
+    for width, height in args.generate:
+        env, _, _ = build_environment(args.seed, width, height, args.density, 0)
+        if env is None:
+            raise SystemExit(f"no connected {width}x{height} map at density {args.density}")
+        maps[f"random-{width}x{height}"] = env.grid
+    if not maps:
+        raise SystemExit("no maps: pass --map and/or --generate")
+    return maps
+
+
+async def serve(args):
+    service = PlanningService(load_maps(args), args.workers, args.window / 1000, args.max_batch)
+    service.start()
+    if args.unix:
+        server = await asyncio.start_unix_server(service.serve_client, path=args.unix, limit=STREAM_LIMIT)
+        where = args.unix
+    else:
+        server = await asyncio.start_server(service.serve_client, args.host, args.port, limit=STREAM_LIMIT)
+        where = f"{args.host}:{args.port}"
+    print(f"serving {', '.join(service.maps)} on {where} with {len(service.workers)} workers", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve plan requests for preloaded maps over a local socket.")
+    parser.add_argument('--map', action='append', default=[], help=".map file to preload (repeatable)")
+    parser.add_argument('--generate', type=parse_size, nargs='+', default=[],
+                        help="random maps to preload, as WxH (named random-WxH)")
+    parser.add_argument('--density', type=float, default=OBSTACLE_DENSITY)
+    parser.add_argument('--seed', type=int, default=BASE_SEED)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--window', type=float, default=BATCH_WINDOW * 1000, help="batching window in ms")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+# simulation.py
+import argparse
+import itertools
+import math
+import os
+import time
+import numpy as np
+from config import GRID_SIZE, NUM_RUNS, OBSTACLE_DENSITY, OBSTACLES_PER_STEP, BASE_SEED
+from runner import ALGORITHMS, INCREMENTAL_PLANNERS, MAX_ATTEMPTS, build_environment, map_seed, parse_size
+from algorithms.ara_star import ARAStar
+from algorithms.theta_star import trace_path
+from utils.results_store import ResultsStore, aggregate
+
+# lazy: repair or replan only when a change lands on the path still ahead;
+# always: replan to the goal on every change, the way the stepwise experiments do
+POLICIES = ('lazy', 'always')
+# Blocked stretches at most this many cells long are patched with a local detour...
+REPAIR_SPAN = 16
+# ...found within this many expansions, otherwise the agent replans to the goal
+REPAIR_BUDGET = 2000
+KEY_FIELDS = ('width', 'height', 'density', 'run', 'algorithm', 'policy')
+FIELDS = list(KEY_FIELDS) + ['status', 'steps', 'cost', 'plan_ms', 'replan_ms', 'validate_ms',
+                             'ms_per_step', 'replans', 'repairs', 'changes']
+SUMMARY_METRICS = ['steps', 'cost', 'replan_ms', 'ms_per_step', 'replans', 'repairs']
+
+
+def obstacle_schedule(env, ticks, every, count, seed):
+    # Obstacle batches drawn up front from the initial free cells, so every algorithm
+    # faces the same changes at the same ticks
+    rng = np.random.default_rng(seed)
+    free = env.free_cells()
+    schedule = {}
+    for tick in range(every, ticks, every):
+        picks = rng.choice(free, size=min(count, len(free)), replace=False)
+        ys, xs = np.divmod(picks, env.width)
+        schedule[tick] = list(zip(xs.tolist(), ys.tolist()))
+    return schedule
+
+
+class Simulation:
+    # An agent moving one cell per tick along its plan while obstacles appear. The route is
+    # kept as rasterised cells with a cell -> position index, so a change set is checked
+    # against the part still ahead in O(changed cells) instead of re-validating the path.
+    def __init__(self, env, start, goal, algo_name, policy='lazy', repair=True):
+        self.env = env
+        self.grid = env.grid
+        self.start = start
+        self.goal = goal
+        self.algo_name = algo_name
+        self.policy = policy
+        # Incremental planners repair themselves when fed the changes, so they skip local repair
+        self.planner = INCREMENTAL_PLANNERS[algo_name](env.grid, start, goal) if algo_name in INCREMENTAL_PLANNERS else None
+        self.repair_enabled = repair and self.planner is None and policy == 'lazy'
+        self.pending = []
+        self.route = []
+        self.where = {}
+        self.step = 0
+        self.plan_time = self.replan_time = self.validate_time = 0.0
+        self.replans = self.repairs = self.changes = self.steps = 0
+        self.cost = 0.0
+
+    @property
+    def position(self):
+        return self.grid.coords(self.route[self.step]) if self.route else self.start
+
+    def set_route(self, cells):
+        self.route = cells
+        self.step = 0
+        self.where = {cell: i for i, cell in enumerate(cells)}
+
+    def plan(self):
+        position = self.position
+        if self.planner is not None:
+            self.planner.move_start(position)
+            path = self.planner.replan(self.pending)
+            self.pending = []
+        else:
+            path = ALGORITHMS[self.algo_name](self.grid, position, self.goal)
+        # Without a path the agent stays put, rather than falling back to the start
+        self.set_route(trace_path(self.grid, path) if path else [self.grid.index(*position)])
+        return bool(path)
+
+    def blocked_ahead(self, changed):
+        ahead = []
+        for x, y in changed:
+            i = self.where.get(self.grid.index(x, y))
+            if i is not None and i > self.step:
+                ahead.append(i)
+        return ahead
+
+    def repair(self, first, last):
+        # Detour from the cell before the blocked stretch to the one after it, spliced into
+        # the remaining route; False when the stretch is too long or no short detour exists
+        if last - first >= REPAIR_SPAN or last + 1 >= len(self.route):
+            return False
+        a, b = self.route[first - 1], self.route[last + 1]
+        detour, _ = ARAStar(self.grid, self.grid.coords(a), self.grid.coords(b), weight=1.0).search(
+            max_expansions=REPAIR_BUDGET)
+        if not detour:
+            return False
+        self.set_route(self.route[self.step:first - 1] + trace_path(self.grid, detour) + self.route[last + 2:])
+        return True
+
+    def apply(self, cells):
+        # The agent's own cell and the goal never fill up
+        here, goal = self.position, self.goal
+        changed = self.env.add_obstacles([cell for cell in cells if cell != here and cell != goal])
+        if not changed:
+            return True
+        self.changes += 1
+        if self.planner is not None:
+            self.pending += changed
+        start_time = time.perf_counter()
+        ahead = self.blocked_ahead(changed)
+        self.validate_time += time.perf_counter() - start_time
+        if not ahead and self.policy == 'lazy':
+            return True
+
+        start_time = time.perf_counter()
+        if ahead and self.repair_enabled and self.repair(min(ahead), max(ahead)):
+            self.repairs += 1
+            found = True
+        else:
+            self.replans += 1
+            found = self.plan()
+        self.replan_time += time.perf_counter() - start_time
+        return found
+
+    def advance(self):
+        if self.step + 1 < len(self.route):
+            a, b = self.grid.coords(self.route[self.step]), self.grid.coords(self.route[self.step + 1])
+            self.cost += math.dist(a, b)
+            self.step += 1
+            self.steps += 1
+
+    def run(self, schedule, max_ticks):
+        start_time = time.perf_counter()
+        found = self.plan()
+        self.plan_time = time.perf_counter() - start_time
+        for tick in range(max_ticks):
+            if not found:
+                return 'no path'
+            if self.position == self.goal:
+                return 'reached'
+            if tick in schedule and not self.apply(schedule[tick]):
+                return 'no path'
+            self.advance()
+        return 'reached' if self.position == self.goal else 'timeout'
+
+    def metrics(self):
+        return {
+            'steps': self.steps,
+            'cost': round(self.cost, 3),
+            'plan_ms': round(self.plan_time * 1000, 4),
+            'replan_ms': round(self.replan_time * 1000, 4),
+            'validate_ms': round(self.validate_time * 1000, 4),
+            'ms_per_step': round((self.replan_time + self.validate_time) * 1000 / max(self.steps, 1), 5),
+            'replans': self.replans,
+            'repairs': self.repairs,
+            'changes': self.changes
+        }
+
+
+def simulate(args, size, run, algo_name, policy):
+    width, height = size
+    env, start, goal = build_environment(args.seed, width, height, args.density, run)
+    if env is None:
+        return None
+    max_ticks = args.max_ticks or 4 * (width + height)
+    # Seeded past the last map attempt, so the schedule never shares a stream with a map
+    schedule = obstacle_schedule(env, max_ticks, args.change_every, args.obstacles_per_step,
+                                 map_seed(args.seed, width, height, args.density, run, MAX_ATTEMPTS))
+    sim = Simulation(env, start, goal, algo_name, policy, repair=not args.no_repair)
+    status = sim.run(schedule, max_ticks)
+    return {'width': width, 'height': height, 'density': args.density, 'run': run,
+            'algorithm': algo_name, 'policy': policy, 'status': status, **sim.metrics()}
+
+
+def summarize(rows):
+    averages = aggregate(rows, ('algorithm', 'policy'), SUMMARY_METRICS, where=lambda row: row['status'] == 'reached')
+    for (algo_name, policy), means in sorted(averages.items()):
+        print(f"{algo_name:<17} {policy:<6} {means['count']:>4} reached  steps {means['steps']:7.1f}  "
+              f"cost {means['cost']:8.2f}  replans {means['replans']:6.2f}  repairs {means['repairs']:6.2f}  "
+              f"replan {means['replan_ms']:9.3f}ms  per step {means['ms_per_step']:8.4f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive an agent along its plan while obstacles appear.")
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[GRID_SIZE], help="grid sizes as WxH")
+    parser.add_argument('--density', type=float, default=OBSTACLE_DENSITY)
+    parser.add_argument('--runs', type=int, default=NUM_RUNS)
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--policies', nargs='+', choices=POLICIES, default=list(POLICIES))
+    parser.add_argument('--obstacles-per-step', type=int, default=OBSTACLES_PER_STEP)
+    parser.add_argument('--change-every', type=int, default=4, help="ticks between obstacle batches")
+    parser.add_argument('--max-ticks', type=int, default=None, help="default: 4 * (width + height)")
+    parser.add_argument('--no-repair', action='store_true', help="always replan to the goal, never patch locally")
+    parser.add_argument('--seed', type=int, default=BASE_SEED)
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simulation_results.csv'))
+    parser.add_argument('--fresh', action='store_true', help="discard existing results instead of resuming")
+    args = parser.parse_args(argv)
+
+    with ResultsStore(args.output, FIELDS, KEY_FIELDS, fresh=args.fresh) as store:
+        for size in args.sizes:
+            for run in range(args.runs):
+                for algo_name, policy in itertools.product(args.algorithms, args.policies):
+                    if (size[0], size[1], args.density, run, algo_name, policy) in store:
+                        continue
+                    row = simulate(args, size, run, algo_name, policy)
+                    if row is None:
+                        print(f"{size[0]}x{size[1]} run {run}: no connected map, skipped")
+                        break
+                    store.append(row)
+        summarize(store.rows())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# tests/reference.py
+from collections import deque
+import numpy as np
+from grid_env import CompactGrid
+
+
+def random_grid(width, height, density, seed):
+    grid = CompactGrid(width, height)
+    grid.assign(np.random.default_rng(seed).random((height, width)) < density)
+    return grid
+
+
+def bfs_distances(grid, source):
+    # Plain 4-connected BFS over (x, y) cells: the reference the planners are checked against
+    dist = {source: 0}
+    queue = deque([source])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if grid.is_free(nx, ny) and (nx, ny) not in dist:
+                dist[(nx, ny)] = dist[(x, y)] + 1
+                queue.append((nx, ny))
+    return dist
+
+
+def free_pairs(grid, count, seed):
+    rng = np.random.default_rng(seed)
+    free = [(x, y) for y in range(grid.height) for x in range(grid.width) if grid.is_free(x, y)]
+    picks = rng.integers(len(free), size=(count, 2))
+    return [(free[a], free[b]) for a, b in picks]
+
+
+def is_valid_path(grid, path, start, goal):
+    # 4-connected steps through free cells from start to goal
+    if not path or path[0] != start or path[-1] != goal:
+        return False
+    if not all(grid.is_free(x, y) for x, y in path):
+        return False
+    return all(abs(ax - bx) + abs(ay - by) == 1 for (ax, ay), (bx, by) in zip(path, path[1:]))
+
+
+def assert_shortest_paths(planner, seeds=range(3), size=(30, 20), density=0.3, pairs=25):
+    # planner(grid, start, goal) returns a shortest 4-connected path, or [] when BFS finds none
+    for seed in seeds:
+        grid = random_grid(*size, density, seed)
+        for start, goal in free_pairs(grid, pairs, seed):
+            dist = bfs_distances(grid, start)
+            path = planner(grid, start, goal)
+            if goal not in dist:
+                assert path == []
+            else:
+                assert is_valid_path(grid, path, start, goal)
+                assert len(path) - 1 == dist[goal]
@@ -0,0 +1,34 @@
+# tests/test_ara_star.py
+from algorithms.ara_star import ara_star, ARAStar
+from reference import assert_shortest_paths, random_grid, bfs_distances, free_pairs, is_valid_path
+
+
+def test_unbounded_search_matches_bfs():
+    assert_shortest_paths(ara_star)
+
+
+def test_budgeted_rounds_keep_their_bounds():
+    # Small expansion budgets make search() resume across calls; every published path must
+    # be valid, no worse than the last one, and within its bound of the optimum
+    for seed in range(3):
+        grid = random_grid(40, 30, 0.25, seed)
+        for start, goal in free_pairs(grid, 10, seed):
+            dist = bfs_distances(grid, start)
+            planner = ARAStar(grid, start, goal, weight=3.0)
+            for _ in range(10000):
+                path, bound = planner.search(max_expansions=25)
+                if planner.done:
+                    break
+                if path:
+                    assert is_valid_path(grid, path, start, goal)
+                    assert len(path) - 1 <= bound * dist[goal]
+            assert planner.done
+            if goal not in dist:
+                assert path == []
+                continue
+            assert len(path) - 1 == dist[goal] and bound == 1.0
+            costs = [cost for _, _, cost, _ in planner.solutions]
+            bounds = [bound for _, _, _, bound in planner.solutions]
+            assert costs == sorted(costs, reverse=True)
+            assert bounds == sorted(bounds, reverse=True)
+            assert all(cost <= b * dist[goal] for cost, b in zip(costs, bounds))
@@ -0,0 +1,23 @@
+# tests/test_astar.py
+from algorithms.astar import astar, bidirectional_astar
+from grid_env import CompactGrid
+from reference import assert_shortest_paths
+
+
+def test_matches_bfs():
+    assert_shortest_paths(astar)
+
+
+def test_bidirectional_matches_bfs():
+    assert_shortest_paths(bidirectional_astar)
+    # Larger, sparser maps, where the two frontiers meet far from both ends
+    assert_shortest_paths(bidirectional_astar, seeds=range(3, 5), size=(60, 50), density=0.15, pairs=15)
+
+
+def test_bidirectional_corner_cases():
+    grid = CompactGrid(5, 1)
+    assert bidirectional_astar(grid, (2, 0), (2, 0)) == [(2, 0)]
+    assert bidirectional_astar(grid, (2, 0), (3, 0)) == [(2, 0), (3, 0)]
+    grid.set_cells([(2, 0)], 1)
+    assert bidirectional_astar(grid, (0, 0), (4, 0)) == []
+    assert bidirectional_astar(grid, (0, 0), (2, 0)) == []
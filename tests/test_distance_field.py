@@ -0,0 +1,49 @@
+# tests/test_distance_field.py
+import pytest
+from grid_env import GridEnvironment
+from algorithms.distance_field import DistanceField, DistanceFieldCache, INF
+from reference import random_grid, bfs_distances, is_valid_path
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_field_matches_bfs(seed):
+    grid = random_grid(30, 20, 0.3, seed)
+    goal = next((x, y) for y in range(20) for x in range(30) if grid.is_free(x, y))
+    field = DistanceField(grid, goal)
+    dist = bfs_distances(grid, goal)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            if not grid.is_free(x, y):
+                continue
+            if (x, y) in dist:
+                assert field.distance((x, y)) == dist[(x, y)]
+                path = field.path_from((x, y))
+                assert is_valid_path(grid, path, (x, y), goal) and len(path) - 1 == dist[(x, y)]
+            else:
+                assert field.distance((x, y)) == INF
+                assert field.path_from((x, y)) == []
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_repair_matches_bfs(seed):
+    env = GridEnvironment(24, 24, obstacle_ratio=0.2, seed=seed)
+    goal = (12, 12)
+    env.clear_cells([goal])
+    fields = DistanceFieldCache(env.grid)
+    env.subscribe(fields.apply_changes)
+    fields.get(goal)
+    for step in range(10):
+        changed = env.add_dynamic_obstacles(10)
+        if step % 3 == 2:
+            env.clear_cells(changed[:4])
+        env.clear_cells([goal])
+        dist = bfs_distances(env.grid, goal)
+        field = fields.get(goal)
+        for y in range(env.height):
+            for x in range(env.width):
+                if env.is_free(x, y):
+                    expected = dist.get((x, y))
+                    if expected is None:
+                        assert fields.path((x, y), goal) == []
+                    else:
+                        assert field.distance((x, y)) == expected
@@ -0,0 +1,37 @@
+# tests/test_dstar_lite.py
+import numpy as np
+import pytest
+from grid_env import GridEnvironment
+from algorithms.dstar_lite import dstar_lite, DStarLite
+from reference import assert_shortest_paths, bfs_distances, is_valid_path
+
+
+def test_plans_match_bfs():
+    assert_shortest_paths(dstar_lite)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_repair_matches_bfs(seed):
+    env = GridEnvironment(30, 30, obstacle_ratio=0.2, seed=seed)
+    start, goal = (0, 0), (29, 29)
+    env.clear_cells([start, goal])
+    planner = DStarLite(env.grid, start, goal)
+    planner.replan()
+    rng = np.random.default_rng(seed)
+    for step in range(12):
+        changed = env.add_dynamic_obstacles(15)
+        if step % 4 == 3:
+            changed += env.clear_cells(changed[:5])
+        # The agent's cell and the goal stay free, as in the simulation
+        changed += env.clear_cells([start, goal])
+        path = planner.replan(changed)
+        dist = bfs_distances(env.grid, start)
+        if goal not in dist:
+            assert path == []
+        else:
+            assert is_valid_path(env.grid, path, start, goal)
+            assert len(path) - 1 == dist[goal]
+        if path and rng.random() < 0.5:
+            # The agent moves on, as it does between replans in the simulation
+            start = path[min(3, len(path) - 1)]
+            planner.move_start(start)
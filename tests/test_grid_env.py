@@ -0,0 +1,46 @@
+# tests/test_grid_env.py
+import numpy as np
+import pytest
+from grid_env import GridEnvironment
+from algorithms.astar import astar
+from algorithms.jps import jps
+from reference import bfs_distances
+
+
+def test_rows_are_read_only():
+    env = GridEnvironment(10, 10, obstacle_ratio=0.0, seed=1)
+    with pytest.raises(TypeError):
+        env.grid[3][5] = 1
+    assert env.grid.version == 0
+
+
+def test_wall_cleared_through_the_environment_reconnects():
+    env = GridEnvironment(10, 10, obstacle_ratio=0.0, seed=1)
+    wall = [(5, y) for y in range(10)]
+    env.add_obstacles(wall)
+    start, goal = (0, 0), (9, 9)
+    assert astar(env.grid, start, goal) == []
+    env.clear_cells([(5, 4)])
+    assert env.connectivity.connected(start, goal)
+    assert len(astar(env.grid, start, goal)) == 19
+    path = jps(env.grid, start, goal)
+    assert path[0] == start and path[-1] == goal
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_connectivity_matches_bfs_after_changes(seed):
+    env = GridEnvironment(24, 24, obstacle_ratio=0.3, seed=seed)
+    rng = np.random.default_rng(seed)
+    cells = [(x, y) for y in range(24) for x in range(24)]
+    for step in range(30):
+        picks = [cells[i] for i in rng.choice(len(cells), size=8, replace=False)]
+        if step % 3 == 2:
+            env.clear_cells(picks)
+        else:
+            env.add_obstacles(picks)
+        anchor = picks[0]
+        if not env.is_free(*anchor):
+            continue
+        reachable = bfs_distances(env.grid, anchor)
+        for cell in picks[1:] + [cells[i] for i in rng.choice(len(cells), size=20)]:
+            assert env.connectivity.connected(anchor, cell) == (cell in reachable)
@@ -0,0 +1,49 @@
+# tests/test_hpa_star.py
+import gc
+import weakref
+import numpy as np
+import pytest
+from algorithms.hpa_star import HierarchicalGrid, hpa_star
+from grid_env import GridEnvironment
+from reference import random_grid, bfs_distances, free_pairs, is_valid_path
+
+
+@pytest.mark.parametrize('size', [(10, 40), (40, 10), (16, 16), (40, 40)])
+def test_finds_every_reachable_goal(size):
+    # 10x40 is a single column of clusters, whose top/bottom borders used to be read as left/right
+    for seed in range(4):
+        grid = random_grid(*size, 0.25, seed)
+        hierarchy = HierarchicalGrid(grid)
+        for start, goal in free_pairs(grid, 40, seed):
+            path = hierarchy.find_path(start, goal)
+            if goal in bfs_distances(grid, start):
+                assert is_valid_path(grid, path, start, goal)
+            else:
+                assert path == []
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_cached_windows_follow_environment_changes(seed):
+    env = GridEnvironment(48, 48, obstacle_ratio=0.2, seed=seed)
+    rng = np.random.default_rng(seed)
+    for step in range(8):
+        env.add_dynamic_obstacles(20)
+        if step % 2:
+            env.clear_cells([(int(x), int(y)) for x, y in rng.integers(0, 48, size=(10, 2))])
+        for start, goal in free_pairs(env.grid, 10, seed + step):
+            path = hpa_star(env, start, goal)
+            if goal in bfs_distances(env.grid, start):
+                assert is_valid_path(env.grid, path, start, goal)
+            else:
+                assert path == []
+
+
+def test_hierarchy_is_freed_with_its_grid():
+    refs = []
+    for seed in range(5):
+        grid = random_grid(40, 40, 0.2, seed)
+        hpa_star(grid, (0, 0), (39, 39))
+        refs.append(weakref.ref(grid.caches['hierarchy']))
+        del grid
+    gc.collect()
+    assert all(ref() is None for ref in refs)
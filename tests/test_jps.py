@@ -0,0 +1,38 @@
+# tests/test_jps.py
+import gc
+import weakref
+import numpy as np
+import pytest
+from algorithms.jps import jps, jps_plus
+from reference import assert_shortest_paths, random_grid, bfs_distances, free_pairs, is_valid_path
+
+
+def test_jump_table_is_freed_with_its_grid():
+    refs = []
+    for seed in range(5):
+        grid = random_grid(20, 20, 0.2, seed)
+        jps_plus(grid, (0, 0), (19, 19))
+        refs.append(weakref.ref(grid.caches['jump_table']))
+        del grid
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+
+@pytest.mark.parametrize('planner', [jps, jps_plus])
+def test_plans_match_bfs(planner):
+    assert_shortest_paths(planner)
+
+
+def test_jump_table_follows_grid_changes():
+    grid = random_grid(30, 20, 0.3, 3)
+    rng = np.random.default_rng(3)
+    for step in range(10):
+        cells = [(int(x), int(y)) for x, y in rng.integers(0, (30, 20), size=(8, 2))]
+        grid.set_cells(cells, step % 2)
+        for start, goal in free_pairs(grid, 10, step):
+            dist = bfs_distances(grid, start)
+            path = jps_plus(grid, start, goal)
+            if goal not in dist:
+                assert path == []
+            else:
+                assert is_valid_path(grid, path, start, goal) and len(path) - 1 == dist[goal]
@@ -0,0 +1,69 @@
+# tests/test_map_loader.py
+import os
+import shutil
+import pytest
+from utils.map_loader import Scenario, cache_path, load_map, load_scenarios, parse_map
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+# tests/fixtures/small.map, '#' for the cells its terrain characters block
+BLOCKED = ['.#..#.',
+           '....#.',
+           '#....#',
+           '..#...']
+
+
+@pytest.fixture
+def map_path(tmp_path):
+    # A private copy, so the .grid cache is written next to it and not into the fixtures
+    path = str(tmp_path / 'small.map')
+    shutil.copy(os.path.join(FIXTURES, 'small.map'), path)
+    return path
+
+
+def cells(grid):
+    return [''.join('#' if not grid.is_free(x, y) else '.' for x in range(grid.width))
+            for y in range(grid.height)]
+
+
+def test_header_gives_the_size():
+    with open(os.path.join(FIXTURES, 'small.map'), 'rb') as file:
+        width, height, body = parse_map(file.read())
+    assert (width, height) == (6, 4)
+    assert body == b'.@..T..GS.O.W....@..T...'
+    # Windows line endings and header fields in any order
+    assert parse_map(b'type octile\r\nwidth 2\r\nheight 1\r\nmap\r\n.@\r\n') == (2, 1, b'.@')
+    with pytest.raises(ValueError):
+        parse_map(b'type octile\nheight 2\nwidth 3\nmap\n...\n')
+
+
+def test_terrain_characters_map_to_free_and_blocked(map_path):
+    # '.', 'G' and 'S' are passable; '@', 'O', 'T' and 'W' are not
+    grid = load_map(map_path, cache=False)
+    assert (grid.width, grid.height) == (6, 4)
+    assert cells(grid) == BLOCKED
+    assert not os.path.exists(cache_path(map_path))
+
+
+def test_cached_grid_matches_and_goes_stale(map_path):
+    parsed = load_map(map_path)
+    assert os.path.exists(cache_path(map_path))
+    cached = load_map(map_path)
+    assert cells(cached) == BLOCKED and bytes(cached.cells) == bytes(parsed.cells)
+    # Edits to a mapped grid stay private to it
+    cached.set_cells([(0, 0)], 1)
+    assert cells(load_map(map_path)) == BLOCKED
+    # A changed source is parsed again instead of served from the old cache
+    with open(map_path, 'rb') as file:
+        data = file.read()
+    with open(map_path, 'wb') as file:
+        # One more byte too, so the size tells it apart even where mtimes are coarse
+        file.write(data.replace(b'.@..T.', b'......') + b'\n')
+    assert cells(load_map(map_path)) == ['......'] + BLOCKED[1:]
+
+
+def test_scenario_rows():
+    scenarios = load_scenarios(os.path.join(FIXTURES, 'small.scen'))
+    assert scenarios == [
+        Scenario(0, 'small.map', 6, 4, (0, 0), (5, 3), 8.0),
+        Scenario(1, 'maps/open room.map', 6, 4, (1, 1), (3, 0), 3.41421356)
+    ]
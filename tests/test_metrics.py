@@ -0,0 +1,18 @@
+# tests/test_metrics.py
+from algorithms.astar import astar
+from utils.metrics import measure_performance, peak_memory_kb
+from reference import random_grid
+
+
+def test_memory_includes_pooled_search_state():
+    grid = random_grid(100, 100, 0.0, 1)
+    context_kb = 16 * len(grid.cells) / 1024
+    # Warm the pool first: the context is reused, not allocated, in the measured calls
+    astar(grid, (0, 0), (99, 99))
+    _, traced_kb = peak_memory_kb(astar, grid, (0, 0), (99, 99))
+    assert traced_kb >= context_kb
+    _, _, measured_kb = measure_performance(astar)(grid, (0, 0), (99, 99))
+    assert measured_kb >= context_kb
+    # Nothing borrowed, nothing added
+    _, idle_kb = peak_memory_kb(len, grid.cells)
+    assert idle_kb < context_kb
@@ -0,0 +1,54 @@
+# tests/test_multi_agent.py
+import pytest
+from algorithms.multi_agent import FleetPlanner, find_conflicts
+from grid_env import CompactGrid
+from reference import random_grid, bfs_distances
+
+
+def test_find_conflicts_reports_vertex_and_swap():
+    assert find_conflicts([[(0, 0), (1, 0)], [(2, 0), (1, 0)]]) == [(1, 'vertex', 0, 1)]
+    assert find_conflicts([[(0, 0), (1, 0)], [(1, 0), (0, 0)]]) == [(0, 'swap', 0, 1)]
+    # Arrived agents hold their last cell
+    assert find_conflicts([[(0, 0)], [(1, 1), (1, 0), (0, 0)]]) == [(2, 'vertex', 0, 1)]
+    assert find_conflicts([[(0, 0), (1, 0), (2, 0)], [(0, 1), (1, 1)]]) == []
+
+
+def test_find_conflicts_keeps_failed_agents_on_their_start():
+    paths = [[(0, 0), (1, 0), (2, 0)], []]
+    assert find_conflicts(paths) == []
+    assert find_conflicts(paths, [(0, 0), (1, 0)]) == [(1, 'vertex', 0, 1)]
+
+
+def test_failed_agent_is_planned_around():
+    # One-cell corridor: whichever agent goes second cannot get past the first, so one of
+    # them stays on its start and the other's path must not run over it
+    grid = CompactGrid(5, 1)
+    pairs = [((0, 0), (4, 0)), ((2, 0), (3, 0))]
+    stats = {}
+    paths = FleetPlanner(grid).plan(pairs, stats=stats)
+    assert stats['failed'] == 1
+    assert sum(1 for path in paths if path) == 1
+    assert find_conflicts(paths, [start for start, _ in pairs]) == []
+
+
+def crowded_pairs(grid, count, seed):
+    # count distinct starts and goals, all in the largest component
+    free = [(x, y) for y in range(grid.height) for x in range(grid.width) if grid.is_free(x, y)]
+    component = max((bfs_distances(grid, cell) for cell in free[::7]), key=len)
+    cells = sorted(component, key=lambda cell: hash((cell, seed)))
+    return list(zip(cells[:count], cells[count:2 * count]))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_crowded_fleet_is_conflict_free(seed):
+    grid = random_grid(32, 32, 0.2, seed)
+    pairs = crowded_pairs(grid, 200, seed)
+    stats = {}
+    paths = FleetPlanner(grid).plan(pairs, stats=stats)
+    assert find_conflicts(paths, [start for start, _ in pairs]) == []
+    assert stats['failed'] == sum(1 for path in paths if not path)
+    for (start, goal), path in zip(pairs, paths):
+        if path:
+            assert path[0] == start and path[-1] == goal
+            for (ax, ay), (bx, by) in zip(path, path[1:]):
+                assert abs(ax - bx) + abs(ay - by) <= 1 and grid.is_free(bx, by)
@@ -0,0 +1,69 @@
+# tests/test_path_cache.py
+from grid_env import GridEnvironment
+from algorithms.astar import astar
+from algorithms.path_cache import PathCache
+
+
+def cached_env(maxsize=256):
+    env = GridEnvironment(10, 10, obstacle_ratio=0.0, seed=1)
+    cache = PathCache(env.grid, maxsize)
+    env.subscribe(cache.apply_changes)
+    return env, cache
+
+
+def test_obstacle_on_a_path_evicts_only_that_path():
+    env, cache = cached_env()
+    top = cache.plan('A*', astar, (0, 0), (9, 0))
+    middle = cache.plan('A*', astar, (0, 5), (9, 5))
+    # Straight runs along their rows: nothing else is as short on an empty map
+    assert top == [(x, 0) for x in range(10)]
+    assert middle == [(x, 5) for x in range(10)]
+    env.add_obstacles([(4, 0)])
+    assert cache.get((0, 0), (9, 0), 'A*') is None
+    assert cache.get((0, 5), (9, 5), 'A*') == middle
+    assert cache.info()['invalidated'] == 1
+    assert (4, 0) not in cache.plan('A*', astar, (0, 0), (9, 0))
+
+
+def test_unrelated_obstacle_keeps_the_entry():
+    env, cache = cached_env()
+    path = cache.plan('A*', astar, (0, 0), (9, 0))
+    env.add_obstacles([(4, 7), (8, 8)])
+    assert cache.get((0, 0), (9, 0), 'A*') == path
+    assert cache.info() == {'hits': 1, 'misses': 1, 'size': 1, 'evicted': 0, 'invalidated': 0}
+
+
+def test_freed_cell_drops_every_path():
+    # A cleared cell can open a shorter route for any cached pair
+    env, cache = cached_env()
+    env.add_obstacles([(5, 9)])
+    cache.plan('A*', astar, (0, 0), (9, 0))
+    cache.plan('A*', astar, (0, 5), (9, 5))
+    env.clear_cells([(5, 9)])
+    assert cache.info()['size'] == 0
+    assert cache.get((0, 0), (9, 0), 'A*') is None
+
+
+def test_unreported_change_drops_every_path():
+    env, cache = cached_env()
+    cache.plan('A*', astar, (0, 0), (9, 0))
+    env.grid.set_cells([(3, 3)], 1)
+    assert cache.get((0, 0), (9, 0), 'A*') is None
+    assert cache.info()['size'] == 0
+
+
+def test_least_recently_used_goes_first():
+    env, cache = cached_env(maxsize=2)
+    for y in range(3):
+        cache.put((0, y), (9, y), 'A*', [(x, y) for x in range(10)])
+    assert cache.get((0, 0), (9, 0), 'A*') is None
+    assert cache.get((0, 1), (9, 1), 'A*') is not None
+    # (0, 1) was just used, so (0, 2) is now the oldest
+    cache.put((0, 3), (9, 3), 'A*', [(x, 3) for x in range(10)])
+    assert cache.get((0, 2), (9, 2), 'A*') is None
+    assert cache.get((0, 1), (9, 1), 'A*') is not None
+    info = cache.info()
+    assert info['size'] == 2 and info['evicted'] == 2
+    # Evicted paths no longer hold on to their cells
+    assert all(len(keys) for keys in cache.users.values())
+    assert {key for keys in cache.users.values() for key in keys} == set(cache.paths)
@@ -0,0 +1,64 @@
+# tests/test_results_store.py
+import csv
+from utils.results_store import ResultsStore
+
+FIELDS = ['run', 'step', 'algorithm', 'seed', 'time_sec']
+
+
+def row(run, step, algorithm='A*', seed=7, time_sec=0.5):
+    return {'run': run, 'step': step, 'algorithm': algorithm, 'seed': seed, 'time_sec': time_sec}
+
+
+def stored(path):
+    with open(path, newline='') as file:
+        return list(csv.reader(file))
+
+
+def test_resume_keeps_rows_and_skips_known_keys(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    with ResultsStore(path, FIELDS) as store:
+        assert store.append([row(1, 0), row(1, 1)]) == 2
+    with ResultsStore(path, FIELDS) as store:
+        assert len(store) == 2
+        assert (1, 1, 'A*', 7) in store
+        assert (1, 2, 'A*', 7) not in store
+        assert store.append([row(1, 1), row(1, 2)]) == 1
+    records = stored(path)
+    assert records[0] == FIELDS
+    assert [record[:2] for record in records[1:]] == [['1', '0'], ['1', '1'], ['1', '2']]
+
+
+def test_truncated_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    with ResultsStore(path, FIELDS) as store:
+        store.append([row(1, 0), row(1, 1)])
+    # A crash in the middle of writing the next row
+    with open(path, 'a') as file:
+        file.write('1,2,A*,7,0.')
+    with ResultsStore(path, FIELDS) as store:
+        assert len(store) == 2
+        assert (1, 2, 'A*', 7) not in store
+        assert store.append(row(1, 2)) == 1
+    assert [record[:2] for record in stored(path)[1:]] == [['1', '0'], ['1', '1'], ['1', '2']]
+
+
+def test_duplicate_keys_are_written_once(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    with ResultsStore(path, FIELDS) as store:
+        assert store.append([row(1, 0), row(1, 0, time_sec=0.9), row(1, 0, seed=8)]) == 2
+        assert store.append(row(1, 0)) == 0
+        assert len(store) == 2
+    records = stored(path)[1:]
+    assert len(records) == 2
+    # The first row under a key wins
+    assert records[0][4] == '0.5'
+
+
+def test_other_columns_are_moved_aside(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    with ResultsStore(path, FIELDS[:-1]) as store:
+        store.append(row(1, 0))
+    with ResultsStore(path, FIELDS) as store:
+        assert len(store) == 0
+    assert stored(path) == [FIELDS]
+    assert stored(path + '.old')[0] == FIELDS[:-1]
@@ -0,0 +1,22 @@
+# tests/test_simulation.py
+import pytest
+from simulation import Simulation, obstacle_schedule
+from runner import build_environment
+from reference import bfs_distances
+
+
+@pytest.mark.parametrize('algo_name', ['A*', 'D*-Lite', 'Theta*', 'JPS'])
+@pytest.mark.parametrize('policy', ['lazy', 'always'])
+def test_agent_reaches_goal_or_goal_is_cut_off(algo_name, policy):
+    for run in range(3):
+        env, start, goal = build_environment(7, 24, 24, 0.2, run)
+        schedule = obstacle_schedule(env, 200, 3, 6, run)
+        sim = Simulation(env, start, goal, algo_name, policy)
+        status = sim.run(schedule, 200)
+        assert status in ('reached', 'no path')
+        if status == 'reached':
+            assert sim.position == goal
+        else:
+            assert goal not in bfs_distances(env.grid, sim.position)
+        # The agent only ever stands on free cells
+        assert env.is_free(*sim.position)
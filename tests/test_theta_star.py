@@ -0,0 +1,32 @@
+# tests/test_theta_star.py
+import gc
+import weakref
+import pytest
+from algorithms.theta_star import theta_star, lazy_theta_star, trace_path
+from reference import random_grid, bfs_distances, free_pairs
+
+
+def test_line_of_sight_cache_is_freed_with_its_grid():
+    refs = []
+    for seed in range(5):
+        grid = random_grid(20, 20, 0.2, seed)
+        theta_star(grid, (0, 0), (19, 19))
+        lazy_theta_star(grid, (0, 0), (19, 19))
+        refs.append(weakref.ref(grid.caches['line_of_sight']))
+        del grid
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+
+@pytest.mark.parametrize('planner', [theta_star, lazy_theta_star])
+def test_reaches_every_reachable_goal(planner):
+    for seed in range(3):
+        grid = random_grid(30, 20, 0.3, seed)
+        for start, goal in free_pairs(grid, 25, seed):
+            path = planner(grid, start, goal)
+            if goal not in bfs_distances(grid, start):
+                assert path == []
+                continue
+            assert path[0] == start and path[-1] == goal
+            # Every segment runs through free cells only
+            assert all(not grid.cells[i] for i in trace_path(grid, path))
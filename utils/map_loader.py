@@ -0,0 +1,112 @@
+# utils/map_loader.py
+import mmap
+import os
+import struct
+from collections import namedtuple
+import numpy as np
+from grid_env import CompactGrid
+
+# Benchmark .map files: a short "type/height/width/map" header, then one character per cell.
+# '.', 'G' and 'S' are passable, everything else ('@', 'O', 'T', 'W') is an obstacle.
+PASSABLE = b'.GS'
+
+# The cache holds the padded CompactGrid buffer followed by this trailer, so the buffer
+# starts at offset 0 and can be mapped directly
+CACHE_MAGIC = b'CGRD0001'
+CACHE_TRAILER = struct.Struct('<8sIIqq')
+
+Scenario = namedtuple('Scenario', 'bucket map width height start goal optimal')
+
+_blocked = np.ones(256, dtype=np.uint8)
+_blocked[list(PASSABLE)] = 0
+
+
+def parse_map(data):
+    # Header lines up to "map", then the rows; returns (width, height, rows as one bytes block)
+    header = {}
+    pos = 0
+    while True:
+        end = data.index(b'\n', pos)
+        line = data[pos:end].strip()
+        pos = end + 1
+        if line == b'map':
+            break
+        key, _, value = line.partition(b' ')
+        header[key.decode()] = value.strip().decode()
+    width, height = int(header['width']), int(header['height'])
+    rows = data[pos:].replace(b'\r', b'').split(b'\n')[:height]
+    if len(rows) != height or any(len(row) < width for row in rows):
+        raise ValueError(f"map body does not match its {width}x{height} header")
+    return width, height, b''.join(row[:width] for row in rows)
+
+
+def read_map(path):
+    with open(path, 'rb') as file:
+        width, height, body = parse_map(file.read())
+    grid = CompactGrid(width, height)
+    grid.interior()[...] = _blocked[np.frombuffer(body, dtype=np.uint8)].reshape(height, width)
+    return grid
+
+
+def cache_path(path):
+    return path + '.grid'
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_cache(path, grid):
+    size, mtime = source_stamp(path)
+    tmp = cache_path(path) + '.tmp'
+    with open(tmp, 'wb') as file:
+        file.write(grid.cells)
+        file.write(CACHE_TRAILER.pack(CACHE_MAGIC, grid.width, grid.height, size, mtime))
+    os.replace(tmp, cache_path(path))
+
+
+def read_cache(path):
+    # The cached buffer mapped copy-on-write: pages are read on demand and edits
+    # (dynamic obstacles) stay private to this process. None if missing or stale.
+    cached = cache_path(path)
+    if not os.path.exists(cached):
+        return None
+    with open(cached, 'rb') as file:
+        total = os.fstat(file.fileno()).st_size
+        if total <= CACHE_TRAILER.size:
+            return None
+        file.seek(total - CACHE_TRAILER.size)
+        magic, width, height, size, mtime = CACHE_TRAILER.unpack(file.read(CACHE_TRAILER.size))
+        length = (width + 2) * (height + 2)
+        if magic != CACHE_MAGIC or (size, mtime) != source_stamp(path) or length != total - CACHE_TRAILER.size:
+            return None
+        cells = mmap.mmap(file.fileno(), length, access=mmap.ACCESS_COPY)
+    return CompactGrid(width, height, cells)
+
+
+def load_map(path, cache=True):
+    grid = read_cache(path) if cache else None
+    if grid is None:
+        grid = read_map(path)
+        if cache:
+            try:
+                write_cache(path, grid)
+            except OSError:
+                pass
+    return grid
+
+
+def load_scenarios(path):
+    # Tab separated: bucket, map, map width, map height, start x, start y, goal x, goal y, optimal length
+    scenarios = []
+    with open(path) as file:
+        for line in file:
+            # Fields are tab separated, which lets map paths contain spaces
+            fields = line.rstrip('\r\n').split('\t') if '\t' in line else line.split()
+            if len(fields) < 9 or fields[0] == 'version':
+                continue
+            bucket, map_name = int(fields[0]), fields[1]
+            width, height, sx, sy, gx, gy = map(int, fields[2:8])
+            scenarios.append(Scenario(bucket, map_name, width, height, (sx, sy), (gx, gy), float(fields[8])))
+    return scenarios
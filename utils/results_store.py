@@ -0,0 +1,125 @@
+# utils/results_store.py
+import csv
+import os
+from collections import defaultdict
+
+
+class ResultsStore:
+    # Append-only CSV of result rows. Rows are flushed as they are added, and the key of
+    # every stored row is loaded on open, so a restarted sweep can skip finished work and
+    # never writes the same key twice. Keys are compared as the strings CSV stores.
+    def __init__(self, path, fields, key_fields=('run', 'step', 'algorithm', 'seed'), fresh=False):
+        self.path = path
+        self.fields = list(fields)
+        self.key_fields = tuple(key_fields)
+        self.keys = set()
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists and self._header() != self.fields:
+            # Written with other columns, so it cannot be resumed: keep it aside and start over
+            os.replace(path, path + '.old')
+            print(f"{path} has different columns, moved to {path}.old")
+            exists = False
+        if exists:
+            self._drop_partial_line()
+            self._load_keys()
+        self.file = open(path, mode='a', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fields, extrasaction='ignore')
+        if not exists:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def _header(self):
+        with open(self.path, newline='') as file:
+            return next(csv.reader(file), None)
+
+    def _drop_partial_line(self):
+        # A crash mid-write can leave half a row behind; cut the file back to its last newline
+        with open(self.path, 'rb+') as file:
+            file.seek(0, os.SEEK_END)
+            size = file.tell()
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                file.seek(pos - step)
+                chunk = file.read(step)
+                newline = chunk.rfind(b'\n')
+                if newline >= 0:
+                    pos = pos - step + newline + 1
+                    break
+                pos -= step
+            if pos != size:
+                file.truncate(pos)
+
+    def _load_keys(self):
+        with open(self.path, newline='') as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            columns = [header.index(field) for field in self.key_fields]
+            for record in reader:
+                self.keys.add(tuple(record[i] for i in columns))
+
+    def key(self, row):
+        return tuple(str(row[field]) for field in self.key_fields)
+
+    def __contains__(self, key):
+        return tuple(str(value) for value in key) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def append(self, rows):
+        # Writes the rows whose key is new and returns how many were written
+        if isinstance(rows, dict):
+            rows = [rows]
+        written = 0
+        for row in rows:
+            key = self.key(row)
+            if key in self.keys:
+                continue
+            self.keys.add(key)
+            self.writer.writerow(row)
+            written += 1
+        if written:
+            self.file.flush()
+        return written
+
+    def rows(self):
+        return read_rows(self.path)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_rows(path):
+    # Streams the stored rows back as dicts of strings
+    with open(path, newline='') as file:
+        yield from csv.DictReader(file)
+
+
+def aggregate(rows, group_by, metrics, where=None):
+    # One pass over rows: running count and sum per group, so memory depends on the number
+    # of groups only. Returns {group: {metric: mean, "count": n}} with groups as string tuples.
+    counts = defaultdict(int)
+    sums = defaultdict(lambda: [0.0] * len(metrics))
+    for row in rows:
+        if where is not None and not where(row):
+            continue
+        group = tuple(str(row[field]) for field in group_by)
+        counts[group] += 1
+        totals = sums[group]
+        for i, metric in enumerate(metrics):
+            totals[i] += float(row[metric])
+    result = {}
+    for group, n in counts.items():
+        means = {metric: total / n for metric, total in zip(metrics, sums[group])}
+        means['count'] = n
+        result[group] = means
+    return result